@@ -0,0 +1,540 @@
+"""
+Adaptive Collector Scheduler
+Runs the slow, mostly-static collectors (CPU model, disk summary, GPU name,
+process scan, ...) from one scheduler thread instead of fixed timers. Each
+collector declares how stale its value may get; the scheduler measures what
+each run costs and tunes the intervals: values that keep coming back
+unchanged are polled less and less often, values that move are polled
+faster, and the whole set is stretched out whenever its combined CPU use
+would exceed the configured budget. Runs go to a small fixed pool of
+worker threads with a deadline each, so a hung subprocess ties up one
+worker and marks its value stale instead of piling up threads. Every
+collector (and any other flaky source, see get_breaker) sits behind a
+circuit breaker, so hardware that isn't there stops being probed each cycle.
+The scheduler can publish its state to a small JSON file so the diagnostics
+tool, which runs as a separate process, can show the live breakers.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+
+# Fraction of one CPU core all collectors together may use (0.02 = 2%)
+DEFAULT_CPU_BUDGET = 0.02
+# Interval multipliers after an unchanged / changed value
+BACKOFF_FACTOR = 1.5
+TIGHTEN_FACTOR = 0.5
+# Weight of the newest run in the smoothed cost
+COST_SMOOTHING = 0.3
+# Worker threads shared by all collectors, and the default per-run deadline
+POOL_WORKERS = 4
+DEFAULT_JOB_TIMEOUT = 5.0
+# Circuit breaker: failures in a row before opening, and the open period
+# (doubled on every failed half-open re-check, capped at the max)
+BREAKER_THRESHOLD = 3
+BREAKER_BASE_OPEN = 5.0
+BREAKER_MAX_OPEN = 600.0
+# Status file shared with the diagnostics process, and how often it's rewritten
+STATUS_FILE = "collector_status.json"
+STATUS_INTERVAL = 5.0
+
+
+class CircuitBreaker:
+    """
+    Stops calling a source after repeated failures and re-checks it on an
+    exponentially growing period.
+
+    closed    -> calls go through; BREAKER_THRESHOLD failures in a row open it
+    open      -> calls are refused until the open period has passed
+    half_open -> one trial call; success closes, failure re-opens for twice as long
+
+    Args:
+        name (str): Label shown in diagnostics.
+        threshold (int): Consecutive failures that open the breaker.
+        base_open (float): First open period in seconds.
+        max_open (float): Longest open period in seconds.
+    """
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, base_open=BREAKER_BASE_OPEN,
+                 max_open=BREAKER_MAX_OPEN):
+        self.name = name
+        self.threshold = threshold
+        self.base_open = base_open
+        self.max_open = max_open
+        self.state = "closed"
+        self.failures = 0        # consecutive
+        self.timeouts = 0        # total
+        self.opened = 0          # times it has opened
+        self.refused = 0         # calls skipped while open
+        self.open_for = 0.0
+        self.retry_at = None     # monotonic time of the next half-open trial
+        self.last_error = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go ahead now (at most one trial while half-open)."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() >= self.retry_at:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            self.refused += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.open_for = 0.0
+            self.retry_at = None
+            self._trial = False
+
+    def record_failure(self, reason="error"):
+        """Count a failure ("error", "timeout" or "empty")."""
+        with self._lock:
+            self.failures += 1
+            self.last_error = reason
+            if reason == "timeout":
+                self.timeouts += 1
+            if self.state == "half_open":
+                self.open_for = min(self.max_open, max(self.base_open, self.open_for * 2))
+            elif self.state == "closed" and self.failures >= self.threshold:
+                self.open_for = self.base_open
+            else:
+                return
+            self.state = "open"
+            self.opened += 1
+            self.retry_at = time.monotonic() + self.open_for
+            self._trial = False
+
+    def call(self, fn, *args, default=None):
+        """
+        Run fn(*args) through the breaker. Exceptions, subprocess timeouts and
+        None results count as failures; refused or failed calls return default.
+        """
+        if not self.allow():
+            return default
+        try:
+            value = fn(*args)
+        except subprocess.TimeoutExpired:
+            self.record_failure("timeout")
+            return default
+        except Exception as e:
+            self.record_failure(f"error: {e}")
+            return default
+        if value is None:
+            self.record_failure("empty")
+            return default
+        self.record_success()
+        return value
+
+    def status(self):
+        with self._lock:
+            remaining = max(0.0, self.retry_at - time.monotonic()) if self.state == "open" else None
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "opened": self.opened,
+                "refused": self.refused,
+                "open_for": self.open_for,
+                "retry_in": round(remaining, 1) if remaining is not None else None,
+                "last_error": self.last_error,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name, **kwargs):
+    """Shared CircuitBreaker for `name`, created on first use."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
+
+def breaker_states():
+    """{name: status()} for every breaker in this process."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.status() for b in breakers}
+
+def read_status(path=STATUS_FILE):
+    """
+    Status published by a running monitor (see AdaptiveScheduler), with its
+    age in seconds added as "age"; None if there is no readable file.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return None
+    status["age"] = round(time.time() - status.get("written_at", 0), 1)
+    return status
+
+
+class Collector:
+    """
+    One scheduled data source and its tuning state.
+
+    Args:
+        name (str): Key the value is published under.
+        fn (callable): Zero-argument function returning the value.
+        staleness (float): Target age in seconds a changing value may reach.
+        min_interval (float): Fastest allowed polling (default: staleness / 4).
+        max_interval (float): Slowest allowed polling (default: staleness * 16).
+        timeout (float): Deadline for one run before its value is marked stale.
+        change_key (callable): Maps a value to what counts as a change
+                               (default: the value itself).
+    """
+
+    def __init__(self, name, fn, staleness, min_interval=None, max_interval=None,
+                 timeout=DEFAULT_JOB_TIMEOUT, change_key=None):
+        self.name = name
+        self.fn = fn
+        self.staleness = staleness
+        self.min_interval = min_interval if min_interval is not None else staleness / 4
+        self.max_interval = max_interval if max_interval is not None else staleness * 16
+        self.interval = staleness
+        self.timeout = timeout
+        self.change_key = change_key or (lambda value: value)
+        self.value = None
+        self.updated = None      # monotonic time of the last successful run
+        self.cost = None         # smoothed CPU seconds per run
+        self.wall_ms = None      # last run's wall time
+        self.runs = 0
+        self.changes = 0
+        self.errors = 0
+        self.run_id = 0          # bumped per submitted run
+        self.running = False     # a run is queued or executing
+        self.overran = False     # the current run blew its deadline
+        self.stale = False       # value is older than a run that overran
+        self.skipped = 0         # due cycles dropped while a run was in flight
+        self.overruns = 0
+        self.blocked = 0         # due cycles refused by the breaker
+        self.breaker = get_breaker(name)
+
+    def load(self):
+        """CPU fraction this collector uses at its current interval."""
+        return (self.cost or 0.0) / self.interval
+
+    def adapt(self, changed):
+        """Back off while the value holds still, tighten while it moves."""
+        if changed:
+            target = min(self.interval * TIGHTEN_FACTOR, self.staleness)
+        else:
+            target = self.interval * BACKOFF_FACTOR
+        self.interval = max(self.min_interval, min(self.max_interval, target))
+
+
+class CollectorPool:
+    """
+    Fixed set of worker threads fed from one queue, with queue metrics.
+
+    Args:
+        workers (int): Number of threads; never grows.
+    """
+
+    def __init__(self, workers=POOL_WORKERS):
+        self.workers = workers
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.submitted = 0
+        self.completed = 0
+        self.last_wait_ms = None
+        self.avg_wait_ms = None
+        self.max_wait_ms = 0.0
+        self._threads = [threading.Thread(target=self._worker, name=f"collector-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, fn, *args):
+        """Queue fn(*args); returns immediately."""
+        with self._lock:
+            self.submitted += 1
+        self._jobs.put((time.perf_counter(), fn, args))
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+
+    def metrics(self):
+        """Depth (queued, not started), busy workers and queue wait in ms."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "busy": self.busy,
+                "depth": self._jobs.qsize(),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "queue_wait_ms": self.last_wait_ms,
+                "queue_wait_avg_ms": round(self.avg_wait_ms, 2) if self.avg_wait_ms is not None else None,
+                "queue_wait_max_ms": round(self.max_wait_ms, 2),
+            }
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            queued_at, fn, args = job
+            wait_ms = (time.perf_counter() - queued_at) * 1000
+            with self._lock:
+                self.busy += 1
+                self.last_wait_ms = round(wait_ms, 2)
+                self.avg_wait_ms = wait_ms if self.avg_wait_ms is None else \
+                    self.avg_wait_ms + COST_SMOOTHING * (wait_ms - self.avg_wait_ms)
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Collector pool job failed: {e}")
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    self.completed += 1
+
+
+class AdaptiveScheduler:
+    """
+    Background runner for a set of Collectors under a shared CPU budget.
+
+    Args:
+        cpu_budget (float): Fraction of one core all collectors may use.
+        workers (int): Size of the fixed worker pool runs are handed to.
+        status_path (str): File the breaker/collector state is written to
+                           every STATUS_INTERVAL seconds (None: don't publish).
+    """
+
+    def __init__(self, cpu_budget=DEFAULT_CPU_BUDGET, workers=POOL_WORKERS, status_path=None):
+        self.cpu_budget = cpu_budget
+        self.status_path = status_path
+        self._status_written = 0.0
+        self._status_lock = threading.Lock()
+        self.collectors = {}
+        self.pool = CollectorPool(workers)
+        self._heap = []          # (when, seq, name, run_id); run_id set = deadline check
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._running = False
+
+    # ---- Registration ----
+    def register(self, name, fn, staleness, min_interval=None, max_interval=None,
+                 timeout=DEFAULT_JOB_TIMEOUT, change_key=None):
+        """Add a collector; it runs as soon as the scheduler is started."""
+        collector = Collector(name, fn, staleness, min_interval, max_interval, timeout, change_key)
+        with self._lock:
+            self.collectors[name] = collector
+            self._schedule(time.monotonic(), name)
+        self._wake.set()
+        return collector
+
+    def get(self, name, default=None):
+        """Latest value of a collector, or default before its first run."""
+        collector = self.collectors.get(name)
+        if collector is None or collector.updated is None:
+            return default
+        return collector.value
+
+    def age(self, name):
+        """Seconds since the collector last produced a value (None if never)."""
+        collector = self.collectors.get(name)
+        if collector is None or collector.updated is None:
+            return None
+        return time.monotonic() - collector.updated
+
+    def is_stale(self, name):
+        """True while a run of this collector is past its deadline."""
+        collector = self.collectors.get(name)
+        return bool(collector and collector.stale)
+
+    # ---- Budget ----
+    def total_load(self):
+        """Combined CPU fraction of all collectors at their current intervals."""
+        return sum(c.load() for c in self.collectors.values())
+
+    def _enforce_budget(self):
+        load = self.total_load()
+        if load <= self.cpu_budget:
+            return
+        # Stretch everyone by the same factor; a collector already at its
+        # max_interval keeps it, so the budget is best-effort in that case
+        factor = load / self.cpu_budget
+        for c in self.collectors.values():
+            c.interval = min(c.max_interval, c.interval * factor)
+
+    def stats(self):
+        """{name: {...}} tuning state for debug output."""
+        now = time.monotonic()
+        return {name: {
+            "interval": round(c.interval, 2),
+            "cost_ms": round(c.cost * 1000, 2) if c.cost is not None else None,
+            "wall_ms": c.wall_ms,
+            "load_pct": round(c.load() * 100, 3),
+            "age": round(now - c.updated, 1) if c.updated is not None else None,
+            "runs": c.runs,
+            "changes": c.changes,
+            "errors": c.errors,
+            "running": c.running,
+            "stale": c.stale,
+            "skipped": c.skipped,
+            "overruns": c.overruns,
+            "blocked": c.blocked,
+            "breaker": c.breaker.state,
+        } for name, c in self.collectors.items()}
+
+    def metrics(self):
+        """Pool depth / queue wait plus totals across collectors."""
+        metrics = self.pool.metrics()
+        metrics["skipped"] = sum(c.skipped for c in self.collectors.values())
+        metrics["overruns"] = sum(c.overruns for c in self.collectors.values())
+        metrics["stale"] = [name for name, c in self.collectors.items() if c.stale]
+        return metrics
+
+    # ---- Status file ----
+    def write_status(self, running=True):
+        """Write breakers, collector stats and pool metrics to status_path."""
+        if not self.status_path:
+            return
+        with self._lock:
+            status = {
+                "written_at": time.time(),
+                "pid": os.getpid(),
+                "running": running,
+                "breakers": breaker_states(),
+                "collectors": self.stats(),
+                "metrics": self.metrics(),
+            }
+        tmp = f"{self.status_path}.tmp"
+        with self._status_lock:
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(status, f)
+                os.replace(tmp, self.status_path)  # readers never see a partial file
+            except OSError as e:
+                print(f"Could not write collector status: {e}")
+
+    def _maybe_write_status(self):
+        now = time.monotonic()
+        with self._lock:
+            if not self._running or not self.status_path or now - self._status_written < STATUS_INTERVAL:
+                return
+            self._status_written = now
+        self.write_status()
+
+    # ---- Run loop ----
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="collectors", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        self.pool.shutdown()
+        self.write_status(running=False)
+
+    def _schedule(self, when, name, run_id=None):
+        heapq.heappush(self._heap, (when, next(self._seq), name, run_id))
+
+    def _loop(self):
+        while self._running:
+            self._wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    delay = self._heap[0][0] - now if self._heap else None
+                    entry = None
+                else:
+                    entry = heapq.heappop(self._heap)
+            if entry is None:
+                self._wake.wait(delay)
+                continue
+
+            _, _, name, run_id = entry
+            with self._lock:
+                c = self.collectors[name]
+                if run_id is not None:
+                    self._check_deadline(c, run_id, now)
+                elif c.running:
+                    # Previous run still going: skip this cycle, look again later
+                    c.skipped += 1
+                    self._schedule(now + c.interval, name)
+                elif not c.breaker.allow():
+                    # Source keeps failing; come back when the breaker half-opens
+                    c.blocked += 1
+                    self._schedule(max(now + c.interval, c.breaker.retry_at or now), name)
+                else:
+                    c.run_id += 1
+                    c.running = True
+                    c.overran = False
+                    self._schedule(now + c.timeout, name, c.run_id)
+                    self.pool.submit(self._run, c, c.run_id)
+
+    def _check_deadline(self, c, run_id, now):
+        """Mark a run that's still going past its deadline (caller holds the lock)."""
+        if not c.running or c.run_id != run_id:
+            return
+        c.overran = True
+        c.stale = True
+        c.overruns += 1
+        c.breaker.record_failure("timeout")
+        print(f"Collector '{c.name}' overran its {c.timeout:g}s deadline, value marked stale")
+        # The finished run won't reschedule; this chain keeps the collector due
+        self._schedule(now + c.interval, c.name)
+
+    def _run(self, c, run_id):
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        error = None
+        try:
+            value = c.fn()
+        except Exception as e:
+            error = e
+        cost = time.thread_time() - cpu_start
+
+        with self._lock:
+            c.running = False
+            c.wall_ms = round((time.perf_counter() - wall_start) * 1000, 2)
+            if error is not None:
+                c.errors += 1
+                c.breaker.record_failure(f"error: {error}")
+                print(f"Collector '{c.name}' failed: {error}")
+            elif value is None:
+                # Nothing to report (no sensor, no GPU): keep the last value
+                c.breaker.record_failure("empty")
+            else:
+                # Also after an overrun: the deadline already counted a failure,
+                # a late success still ends the run of consecutive ones
+                c.breaker.record_success()
+                c.cost = cost if c.cost is None else c.cost + COST_SMOOTHING * (cost - c.cost)
+                changed = c.updated is not None and c.change_key(value) != c.change_key(c.value)
+                c.runs += 1
+                if changed:
+                    c.changes += 1
+                # The first run has nothing to compare against; keep the declared interval
+                if c.updated is not None:
+                    c.adapt(changed)
+                c.value = value
+                c.updated = time.monotonic()
+                c.stale = False
+            self._enforce_budget()
+            if not c.overran:
+                self._schedule(time.monotonic() + c.interval, c.name)
+        self._wake.set()
+        self._maybe_write_status()
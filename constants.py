@@ -51,10 +51,23 @@ FONT_INFO = ("Consolas","bold")
 REFRESH_GUI_MS = 100
 REFRESH_HEAVY_MS = REFRESH_MS * 5
 REFRESH_SLOW_MS = REFRESH_MS * 2
+# CPU share (of one core) the adaptive collectors may use together;
+# REFRESH_HEAVY_MS is their target staleness for fast-moving values
+COLLECTOR_CPU_BUDGET = 0.02
+# Fast-metric sampling rate; 10-20 samples per REFRESH_MS point are reduced
+# to mean/min/max so short spikes still show. 0 samples once per point.
+# (The flight recorder runs its own cheap sampler and doesn't depend on this.)
+SAMPLE_HZ = 0
 
 NETWORK_INTERFACE = None
 PING_HOST = "8.8.8.8"
 PING_COUNT = 3
+# Server sweep: probes per server and max servers probed at once
+PING_SWEEP_COUNT = 10
+PING_SWEEP_CONCURRENCY = 8
+
+# Process table backend: "psutil" (all platforms) or "procfs" (Linux raw /proc reader)
+PROCESS_BACKEND = "psutil"
 
 # Configuration defaults
 DEFAULT_CONFIG = {
@@ -34,71 +34,120 @@ def get_temp_color_crt(value):
 
 # This class runs in a separate thread to collect data without blocking the GUI.
 class ThreadedDataFetcher(threading.Thread):
-    def __init__(self, data_queue, interval=1.0):
+    """
+    Samples sample_all() on a fixed monotonic schedule and publishes one
+    history point per `interval`. With sample_hz set (10-20), every point is
+    the mean of the samples in its bucket and the *_min/*_max series keep the
+    spikes the mean smooths away.
+
+    Args:
+        data_queue: Queue the history dict is pushed to for the GUI.
+        interval (float): Seconds per published point (display rate).
+        sample_hz (float): Sampling rate; 0 samples once per interval.
+    """
+
+    # Series that also get per-bucket *_min / *_max companions
+    AGGREGATED_KEYS = ("CPU", "RAM", "GPU", "DISK_read", "DISK_write", "NET_recv", "NET_sent")
+
+    def __init__(self, data_queue, interval=1.0, sample_hz=0):
         super().__init__()
         self.data_queue = data_queue
         self.interval = interval
+        self.sample_period = min(interval, 1.0 / sample_hz) if sample_hz else interval
         self.running = True
+        self._stop_event = threading.Event()
         self.history = {
             "CPU": [], "RAM": [], "GPU": [], 
             "DISK_read": [], "DISK_write": [], 
             "NET_recv": [], "NET_sent": [],
-            "CPU_temp": [], "GPU_temp": []  # Add temperature history
+            "CPU_temp": [], "GPU_temp": [],  # Add temperature history
+            # Kernel TCP/UDP health, per second
+            "TCP_retrans": [], "TCP_ooo": [], "TCP_listen_drops": [], "UDP_rcvbuf_err": [],
+            # Wall-clock time of the last sample in each published point
+            "TIME": []
         }
-        self.last_disk_check_time = time.time()
-        self.last_net_io = psutil.net_io_counters(pernic=True) if 'psutil' in globals() else None
+        for key in self.AGGREGATED_KEYS:
+            self.history[f"{key}_min"] = []
+            self.history[f"{key}_max"] = []
         self.daemon = True # This thread will exit when the main program exits
-        self.primary_interface = core.get_primary_interface() if 'core' in globals() else None
+        self.last_snapshot = None
+        self.samples = 0
+        self.skipped = 0  # sample ticks dropped because collection overran
+        # Per-core busy %, one point per published history point (the display window)
+        self.core_engine = core.PerCoreCpuEngine(history_len=MAX_POINTS)
+
+    @staticmethod
+    def _extract(snap):
+        """Metric name -> value for one snapshot (None values left out)."""
+        values = {
+            "CPU": snap.cpu_percent, "RAM": snap.ram_percent, "GPU": snap.gpu_usage,
+            "DISK_read": snap.disk_read_mb, "DISK_write": snap.disk_write_mb,
+            "NET_recv": snap.net_recv_mb, "NET_sent": snap.net_sent_mb,
+            "CPU_temp": snap.cpu_temp, "GPU_temp": snap.gpu_temp,
+        }
+        health = snap.net_health
+        if health:
+            for key, field in (("TCP_retrans", "retrans"), ("TCP_ooo", "out_of_order"),
+                               ("TCP_listen_drops", "listen_drops"), ("UDP_rcvbuf_err", "udp_rcvbuf_errors")):
+                values[key] = health[field]
+        return {k: v for k, v in values.items() if v is not None}
+
+    def _publish(self, bucket, snap):
+        """Reduce one bucket of samples to a history point and hand it to the GUI."""
+        for key, values in bucket.items():
+            self.history[key].append(sum(values) / len(values))
+            if key in self.AGGREGATED_KEYS:
+                self.history[f"{key}_min"].append(min(values))
+                self.history[f"{key}_max"].append(max(values))
+        self.history["TIME"].append(snap.timestamp)
+
+        for key in self.history:
+            if len(self.history[key]) > MAX_POINTS:
+                self.history[key].pop(0)
+
+        data = self.history.copy()
+        # Busy % per core over the whole display interval (the engine keeps its
+        # own baseline, so this reuses the snapshot's counters with no extra read)
+        breakdown = self.core_engine.update(snap.cpu_counters)
+        if breakdown is not None:
+            data["CORE_busy"] = breakdown["busy"]
+            data["CORE_peak"] = [max(h) if h else 0.0 for h in self.core_engine.histories()]
+
+        # Put the new data on the queue for the main thread to pick up
+        self.data_queue.put(data)
 
     def run(self):
+        # Tick k is due at start + k * sample_period, so collection time never
+        # accumulates into drift; a tick that overruns skips the ones it missed
+        start = time.monotonic()
+        tick = 0
+        bucket = {}
         while self.running:
-            # CPU / RAM / GPU data
-            cpu = core.get_cpu_usage()
-            ram_percent = core.get_ram_usage()
-            gpu = core.get_gpu_usage()
-
-            # Temperature data
-            cpu_temp = core.get_cpu_temp() if hasattr(core, 'get_cpu_temp') else None
-            gpu_temp = core.get_gpu_temp() if hasattr(core, 'get_gpu_temp') else None
-
-            # Disk I/O, calculated over a period to get MB/s
-            now = time.time()
-            read_mb, write_mb = core.get_disk_io(interval=self.interval)
-            
-            # Network I/O
-            net_recv_mb, net_sent_mb = 0, 0
-            current_net_io = psutil.net_io_counters(pernic=True) if 'psutil' in globals() else None
-            
-            if current_net_io and self.last_net_io and self.primary_interface:
-                if self.primary_interface in current_net_io and self.primary_interface in self.last_net_io:
-                    recv_bytes_delta = current_net_io[self.primary_interface].bytes_recv - self.last_net_io[self.primary_interface].bytes_recv
-                    sent_bytes_delta = current_net_io[self.primary_interface].bytes_sent - self.last_net_io[self.primary_interface].bytes_sent
-                    net_recv_mb = (recv_bytes_delta / 1024 / 1024) / self.interval
-                    net_sent_mb = (sent_bytes_delta / 1024 / 1024) / self.interval
-                self.last_net_io = current_net_io
-
-            # Append to history, maintaining fixed size
-            if cpu is not None: self.history["CPU"].append(cpu)
-            if ram_percent is not None: self.history["RAM"].append(ram_percent)
-            if gpu is not None: self.history["GPU"].append(gpu)
-            if read_mb is not None: self.history["DISK_read"].append(read_mb)
-            if write_mb is not None: self.history["DISK_write"].append(write_mb)
-            if net_recv_mb is not None: self.history["NET_recv"].append(net_recv_mb)
-            if net_sent_mb is not None: self.history["NET_sent"].append(net_sent_mb)
-            if cpu_temp is not None: self.history["CPU_temp"].append(cpu_temp)
-            if gpu_temp is not None: self.history["GPU_temp"].append(gpu_temp)
-
-            for key in self.history:
-                if len(self.history[key]) > MAX_POINTS:
-                    self.history[key].pop(0)
-
-            # Put the new data on the queue for the main thread to pick up
-            self.data_queue.put(self.history.copy())
-            
-            time.sleep(self.interval)
+            # One pass over every kernel source; all metrics below come from it
+            snap = core.sample_all(previous=self.last_snapshot)
+            self.last_snapshot = snap
+            self.samples += 1
+
+            for key, value in self._extract(snap).items():
+                bucket.setdefault(key, []).append(value)
+
+            now = time.monotonic()
+            next_tick = max(tick + 1, int((now - start) / self.sample_period) + 1)
+            self.skipped += next_tick - tick - 1
+            # Publish once the next tick belongs to a later display bucket
+            if self._bucket(next_tick) != self._bucket(tick):
+                self._publish(bucket, snap)
+                bucket = {}
+            tick = next_tick
+
+            self._stop_event.wait(max(0.0, start + tick * self.sample_period - time.monotonic()))
+
+    def _bucket(self, tick):
+        return int(tick * self.sample_period / self.interval + 1e-9)
 
     def stop(self):
         self.running = False
+        self._stop_event.set()
 
 
 # This class encapsulates all drawing logic and state.
@@ -234,7 +283,7 @@ class CRTGrapher:
         self.draw_crt_line(self.temp_canvas, smoothed_cpu, max_temp, cpu_color, tags="cpu_line")
         self.draw_crt_line(self.temp_canvas, smoothed_gpu, max_temp, "#FFFFFF", tags="gpu_line")#white fpr GPU
 
-    def draw_metric(self, canvas, series, max_value, color):
+    def draw_metric(self, canvas, series, max_value, color, peak=None):
         canvas.delete("all")
         w = canvas.winfo_width()
         grid_spacing = max(1, w // 10)
@@ -253,6 +302,29 @@ class CRTGrapher:
         # Draw the filled area first, then the line, so the line is always on top.
         self.draw_filled_area(canvas, smoothed_series, max_value, fill_color)
         self.draw_crt_line(canvas, smoothed_series, max_value, color)
+        # Unsmoothed per-bucket maxima: spikes the mean line averages away
+        if peak:
+            self.draw_crt_line(canvas, peak, max_value, fill_color, width=1, tags="peak")
+
+    def draw_core_bars(self, canvas, busy, peaks=None):
+        """Draw one vertical bar per logical core, colored by load, with a tick at each core's window peak."""
+        canvas.delete("all")
+        if not busy:
+            return
+        w = max(canvas.winfo_width(), 1)
+        h = max(canvas.winfo_height(), 1)
+        slot = w / len(busy)
+        gap = 1 if slot > 3 else 0
+        for i, value in enumerate(busy):
+            value = max(0.0, min(100.0, value))
+            x0 = i * slot + gap
+            x1 = (i + 1) * slot - gap
+            top = h - (value / 100.0) * h
+            canvas.create_rectangle(x0, 0, x1, h, outline="#224422")
+            canvas.create_rectangle(x0, top, x1, h, fill=get_usage_color(value), outline="")
+            if peaks and i < len(peaks):
+                peak_y = h - (max(0.0, min(100.0, peaks[i])) / 100.0) * h
+                canvas.create_line(x0, peak_y, x1, peak_y, fill=get_usage_color(peaks[i]))
 
     def update_dual_io_labels(self, read_mb, write_mb):
         self.io_read_lbl.config(text=f"READ: {read_mb:.2f} MB/s")
@@ -5,6 +5,7 @@ Tests all monitor_core.py functions and displays detection status
 
 import sys
 import os
+import time
 from datetime import datetime
 import io
 
@@ -58,7 +59,7 @@ def run_diagnostics():
     output.write("-"*60 + "\n", Colors.WHITE)
     
     modules_required = ['psutil', 'subprocess', 'platform', 'time', 'shutil', 're', 'os', 'sys', 'datetime']
-    modules_optional = ['wmi', 'json']
+    modules_optional = ['wmi', 'json', 'pynvml']
     
     all_available = True
     
@@ -85,6 +86,8 @@ def run_diagnostics():
     try:
         sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
         import monitor_core
+        import tcp_core
+        import collector_core
     except ImportError as e:
         output.write(f"\n✗ Cannot import monitor_core.py: {e}\n", Colors.RED)
         return output
@@ -115,6 +118,11 @@ def run_diagnostics():
             output.write(f"✓ CPU Temperature: {temp}°C\n", Colors.GREEN)
         else:
             output.write(f"✗ CPU Temperature: Not Available\n", Colors.RED)
+        
+        monitor_core.get_top_processes()
+        scan = monitor_core.process_core.get_process_table().stats()
+        scan_color = Colors.GREEN if scan['last_scan_ms'] < 250 else Colors.YELLOW
+        output.write(f"✓ Process Scan: {scan['process_count']} processes in {scan['last_scan_ms']:.1f} ms\n", scan_color)
     except Exception as e:
         output.write(f"✗ CPU Detection Error: {e}\n", Colors.RED)
     
@@ -136,8 +144,14 @@ def run_diagnostics():
     output.write("-"*60 + "\n", Colors.WHITE)
     
     try:
-        read, write = monitor_core.get_disk_io()
-        output.write(f"✓ Disk I/O: R:{read:.2f} MB/s W:{write:.2f} MB/s\n", Colors.GREEN)
+        # Own baseline so this check never disturbs the GUI's disk rates
+        tracker = monitor_core.DiskRateTracker()
+        time.sleep(0.25)
+        rates = tracker.sample()
+        output.write(f"✓ Disk I/O: R:{rates['read_mb']:.2f} MB/s W:{rates['write_mb']:.2f} MB/s\n", Colors.GREEN)
+        for dev, d in sorted(rates["devices"].items()):
+            output.write(f"  {dev}: {d['read_iops']:.0f}/{d['write_iops']:.0f} IOPS r/w, "
+                         f"await {d['await_ms']:.1f} ms, busy {d['busy_pct']:.0f}%\n", Colors.WHITE)
         
         summary = monitor_core.get_disk_summary()
         if summary:
@@ -152,15 +166,15 @@ def run_diagnostics():
     output.write("-"*60 + "\n", Colors.WHITE)
     
     try:
-        nvidia = monitor_core._nvidia_smi_available()
-        amd = monitor_core._rocm_smi_available()
+        provider = monitor_core.gpu_core.get_gpu_provider()
         
-        if not nvidia and not amd:
-            output.write(f"✗ GPU: Not detected (no nvidia-smi/rocm-smi)\n", Colors.RED)
+        if provider is None:
+            output.write(f"✗ GPU: Not detected (no NVML/nvidia-smi/rocm-smi)\n", Colors.RED)
         else:
             info = monitor_core.get_gpu_info()
             if info:
                 output.write(f"✓ GPU: {info}\n", Colors.GREEN)
+            output.write(f"  Provider: {provider.source}\n", Colors.WHITE)
             
             usage = monitor_core.get_gpu_usage()
             if usage is not None:
@@ -185,8 +199,18 @@ def run_diagnostics():
         if interface_name:
             output.write(f"✓ Primary Interface: {interface_name} ({connection_type})\n", Colors.GREEN)
             
-            net_in, net_out, latency, iface, conn_type = monitor_core.net_usage_latency(interface=interface_name, ping_count=1)
+            # Own tracker (this runs outside the GUI process, so there is no
+            # earlier baseline): two samples a short sleep apart, like disk I/O
+            net_tracker = monitor_core.NetRateTracker(interface_name)
+            net_tracker.sample()
+            time.sleep(0.3)
+            net_in, net_out, _, _ = net_tracker.sample()
             output.write(f"✓ Network I/O: In:{net_in} Out:{net_out} MB/s\n", Colors.GREEN)
+            latency = monitor_core.ping_host("8.8.8.8", 1)
+            tracker = monitor_core.get_net_tracker()
+            registry = monitor_core.net_core.get_interface_registry()
+            output.write(f"  Tracking: {tracker.interface} ({tracker.reselections} selection(s), "
+                         f"{registry.source} events: {registry.events}, refreshes: {registry.refreshes})\n", Colors.WHITE)
             
             if latency:
                 output.write(f"✓ Latency: {latency} ms\n", Colors.GREEN)
@@ -194,9 +218,52 @@ def run_diagnostics():
                 output.write(f"⚠ Latency: Ping failed\n", Colors.YELLOW)
         else:
             output.write(f"✗ Network: No active interface\n", Colors.RED)
+        
+        if tcp_core.SOCK_DIAG_AVAILABLE:
+            endpoints = tcp_core.TcpRttCollector().collect()
+            conns = sum(ep["connections"] for ep in endpoints.values())
+            output.write(f"✓ sock_diag: {conns} established TCP connections to {len(endpoints)} endpoints\n", Colors.GREEN)
+        else:
+            output.write(f"⚠ sock_diag: Not available on this platform\n", Colors.YELLOW)
     except Exception as e:
         output.write(f"✗ Network Detection Error: {e}\n", Colors.RED)
     
+    # Circuit breakers (sources that are skipped after repeated failures)
+    output.write("\n[CIRCUIT BREAKERS]\n", Colors.MAGENTA)
+    output.write("-"*60 + "\n", Colors.WHITE)
+    
+    try:
+        # The monitor publishes its breakers to a status file; the ones in this
+        # process only cover the checks run by the diagnostics above
+        status = collector_core.read_status()
+        if status is None:
+            output.write("  Monitor not running (no status file), showing this process only\n", Colors.YELLOW)
+            states = collector_core.breaker_states()
+        else:
+            age = status["age"]
+            live = status.get("running") and age < collector_core.STATUS_INTERVAL * 3
+            output.write(f"  From monitor pid {status.get('pid')}, updated {age:.0f}s ago"
+                         f"{'' if live else ' (not running)'}\n", Colors.WHITE if live else Colors.YELLOW)
+            states = {**collector_core.breaker_states(), **status.get("breakers", {})}
+            metrics = status.get("metrics", {})
+            if metrics:
+                output.write(f"  Collector pool: {metrics.get('busy')}/{metrics.get('workers')} busy, "
+                             f"depth {metrics.get('depth')}, {metrics.get('overruns')} overrun(s), "
+                             f"stale: {', '.join(metrics.get('stale') or []) or 'none'}\n", Colors.WHITE)
+        if not states:
+            output.write("  No breakers registered yet\n", Colors.WHITE)
+        for name, st in sorted(states.items()):
+            if st["state"] == "closed":
+                output.write(f"✓ {name:<20} [CLOSED] failures: {st['failures']}\n", Colors.GREEN)
+            else:
+                retry = f"retry in {st['retry_in']}s" if st["retry_in"] is not None else "re-checking"
+                color = Colors.RED if st["state"] == "open" else Colors.YELLOW
+                output.write(f"⚠ {name:<20} [{st['state'].upper()}] {retry}, open {st['open_for']:.0f}s, "
+                             f"opened {st['opened']}x, {st['timeouts']} timeout(s), "
+                             f"last: {st['last_error']}\n", color)
+    except Exception as e:
+        output.write(f"✗ Breaker Status Error: {e}\n", Colors.RED)
+    
     # Summary
     output.write("\n" + "="*60 + "\n", Colors.CYAN)
     output.write("DIAGNOSTIC COMPLETE\n", Colors.CYAN)
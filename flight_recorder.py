@@ -0,0 +1,219 @@
+"""
+Flight Recorder
+Samples CPU (total and per core) and RAM on its own thread at a modest fixed
+rate into preallocated ring buffers, so that when an alert fires (high CPU,
+temperature, latency) the lead-up is still there. Only /proc/stat and
+meminfo are read at that rate, independent of the display fetcher and its
+SAMPLE_HZ; temperatures and latency move at 1 Hz and are taken from the
+latest Snapshot and latency reading once a second. A trigger captures a
+window before and after the event, plus the top processes, and writes it
+as one gzipped JSON file from a background thread.
+"""
+
+import gzip
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from datetime import datetime
+
+import psutil
+
+import monitor_core as core
+import process_core
+
+DEFAULT_RECORD_DIR = "flight_records"
+# Recorder sampling rate; only two cheap reads per sample
+DEFAULT_SAMPLE_HZ = 10
+# Seconds between refreshes of the 1 Hz values (temperatures, latency)
+SLOW_REFRESH = 1.0
+# Seconds kept in the ring, and captured before / after a trigger
+RING_SECONDS = 60
+PRE_SECONDS = 20
+POST_SECONDS = 10
+# Ignore further triggers for this long after one (alerts repeat every frame)
+TRIGGER_COOLDOWN = 120
+TOP_PROCESS_COUNT = 10
+
+# Scalar series recorded per sample
+FIELDS = ("cpu", "ram", "cpu_temp", "gpu_temp", "latency")
+
+
+class FlightRecorder:
+    """
+    Ring buffer of recent CPU/RAM/temperature/latency samples plus event capture.
+
+    Args:
+        sample_hz (float): Sampling rate of the recorder thread (sizes the ring).
+        ring_seconds (float): History kept at all times.
+        record_dir (str): Where captures are written.
+        latency (callable): Returns the current latency in ms (or None).
+        processes (callable): Returns the GUI's latest top-process lines,
+                              recorded as they stood at the trigger.
+    """
+
+    def __init__(self, sample_hz=DEFAULT_SAMPLE_HZ, ring_seconds=RING_SECONDS, record_dir=DEFAULT_RECORD_DIR,
+                 latency=None, processes=None):
+        self.sample_hz = sample_hz
+        self.latency = latency
+        self.processes = processes
+        # Own table: scanning the shared one would reset the CPU% baselines
+        # the GUI's process collector measures against
+        self._process_table = process_core.create_process_table()
+        self.capacity = max(1, int(math.ceil(ring_seconds * sample_hz)))
+        self.cores = psutil.cpu_count(logical=True) or 1
+        self.record_dir = record_dir
+        # Preallocated once; push() only overwrites slots
+        self._time = array("d", [math.nan]) * self.capacity
+        self._series = {name: array("f", [math.nan]) * self.capacity for name in FIELDS}
+        self._core_busy = array("f", [math.nan]) * (self.capacity * self.cores)
+        self._count = 0          # total samples ever pushed
+        self._lock = threading.Lock()
+        self._pending = None     # active capture, see trigger()
+        self._last_trigger = None
+        self.captures = []       # paths written so far
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # ---- Sampling ----
+    def start(self):
+        """Start the sampling thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample_loop, name="flight-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the sampling thread (a running capture still gets written)."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _sample_loop(self):
+        # Deadline-scheduled like the display fetcher: no drift, overruns skip
+        period = 1.0 / self.sample_hz
+        start = time.monotonic()
+        tick = 0
+        prev = core.read_cpu_counters()
+        slow = (None, None, None)
+        slow_at = -SLOW_REFRESH
+        while not self._stop_event.is_set():
+            tick = max(tick + 1, int((time.monotonic() - start) / period) + 1)
+            if self._stop_event.wait(max(0.0, start + tick * period - time.monotonic())):
+                break
+            cur = core.read_cpu_counters()
+            cpu = core.cpu_core_breakdown(prev, cur)
+            prev = cur
+            try:
+                ram = psutil.virtual_memory().percent
+            except Exception:
+                ram = None
+            if time.monotonic() - slow_at >= SLOW_REFRESH:
+                slow_at = time.monotonic()
+                slow = self._read_slow()
+            self.push(time.time(), (cpu["total"] if cpu else None, ram) + slow, cpu["busy"] if cpu else ())
+
+    def _read_slow(self):
+        """(cpu_temp, gpu_temp, latency) from the latest Snapshot and latency source."""
+        snap = core.get_last_snapshot(max_age=5)
+        latency = None
+        if self.latency is not None:
+            try:
+                latency = self.latency()
+            except Exception:
+                latency = None
+        return (snap.cpu_temp if snap else None, snap.gpu_temp if snap else None, latency)
+
+    # ---- Recording ----
+    def push(self, timestamp, values, busy=()):
+        """
+        Store one sample; called from the sampling thread.
+
+        Args:
+            timestamp (float): Unix time of the sample.
+            values (tuple): One value (or None) per FIELDS entry, in order.
+            busy (list): Busy % per core.
+        """
+        with self._lock:
+            slot = self._count % self.capacity
+            self._time[slot] = timestamp
+            for name, value in zip(FIELDS, values):
+                self._series[name][slot] = math.nan if value is None else value
+            base = slot * self.cores
+            for i in range(self.cores):
+                self._core_busy[base + i] = busy[i] if i < len(busy) else math.nan
+            self._count += 1
+            pending = self._pending
+        if pending and self._count >= pending["until"]:
+            pending["done"].set()
+
+    def _window(self, first, last):
+        """Copy samples [first, last) out of the ring (caller holds the lock)."""
+        first = max(first, self._count - self.capacity, 0)
+        slots = [i % self.capacity for i in range(first, last)]
+        clean = lambda v: None if math.isnan(v) else round(v, 2)
+        return {
+            "time": [self._time[s] for s in slots],
+            "series": {name: [clean(values[s]) for s in slots] for name, values in self._series.items()},
+            "cores": [[clean(self._core_busy[s * self.cores + i]) for i in range(self.cores)] for s in slots],
+        }
+
+    # ---- Capture ----
+    def trigger(self, reason):
+        """
+        Start a capture around now. Returns False if one is already running
+        or the cooldown hasn't passed. Never blocks the caller.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._pending or (self._last_trigger and now - self._last_trigger < TRIGGER_COOLDOWN):
+                return False
+            self._last_trigger = now
+            pending = {
+                "reason": reason,
+                "at": time.time(),
+                "index": self._count,
+                "until": self._count + int(POST_SECONDS * self.sample_hz),
+                "done": threading.Event(),
+            }
+            self._pending = pending
+        threading.Thread(target=self._capture, args=(pending,), name="flight-recorder", daemon=True).start()
+        return True
+
+    def _capture(self, pending):
+        try:
+            # What the GUI last showed, while the offender is most likely still
+            # on top; the own table is baselined now and read again after the
+            # post window, so "after" is CPU% over exactly that window
+            processes_at = self.processes() if self.processes else None
+            self._process_table.scan()
+            pending["done"].wait(POST_SECONDS * 2)
+            processes_after = [process_core.format_process_row(row)
+                               for row in self._process_table.top(TOP_PROCESS_COUNT)]
+            with self._lock:
+                window = self._window(pending["index"] - int(PRE_SECONDS * self.sample_hz), self._count)
+            record = {
+                "reason": pending["reason"],
+                "triggered_at": pending["at"],
+                "sample_hz": self.sample_hz,
+                "pre_seconds": PRE_SECONDS,
+                "post_seconds": POST_SECONDS,
+                "processes": {"at_trigger": processes_at, "after": processes_after},
+                **window,
+            }
+            self.captures.append(self._write(record))
+        except Exception as e:
+            print(f"Flight recorder capture failed: {e}")
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def _write(self, record):
+        os.makedirs(self.record_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(record["triggered_at"]).strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.record_dir, f"flight_{stamp}.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(record, f, separators=(",", ":"))
+        print(f"Flight record saved: {path} ({record['reason']})")
+        return path
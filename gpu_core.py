@@ -0,0 +1,547 @@
+"""
+GPU Providers
+Long-lived GPU metric sources used by monitor_core.
+A provider is opened once and returns usage, temperature, SM clock and memory
+in a single read, so the per-second GPU calls share one query.
+"""
+
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+# Reads closer together than this reuse the previous result, so
+# get_gpu_usage() + get_gpu_temp() + get_gpu_clock_speed() in one tick
+# only cost a single query.
+READ_CACHE_SEC = 0.25
+
+EMPTY_STATS = {"usage": None, "temp": None, "clock": None, "mem_used_mb": None, "mem_total_mb": None}
+
+
+def _run_cmd(args, timeout=0.3):
+    """Run a subprocess command and return its output."""
+    try:
+        out = subprocess.check_output(args, stderr=subprocess.DEVNULL, timeout=timeout, text=True)
+        return out.strip()
+    except Exception:
+        return None
+
+def _to_float(value):
+    try:
+        return float(str(value).strip().rstrip('%C ').strip())
+    except (TypeError, ValueError):
+        return None
+
+
+class GpuProvider:
+    """Base class: caches the last read for READ_CACHE_SEC seconds."""
+    source = "none"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_read = None
+        self._last_read_ts = 0.0
+
+    def read(self):
+        """
+        Return a dict {"usage", "temp", "clock", "mem_used_mb", "mem_total_mb"}.
+        Values the device doesn't report are None.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._last_read is None or now - self._last_read_ts >= READ_CACHE_SEC:
+                try:
+                    stats = self._read()
+                except Exception:
+                    stats = None
+                self._last_read = dict(EMPTY_STATS, **(stats or {}))
+                self._last_read_ts = now
+            return dict(self._last_read)
+
+    def _read(self):
+        raise NotImplementedError
+
+    def get_name(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class NvmlGpuProvider(GpuProvider):
+    """
+    NVIDIA provider backed by NVML. The library is initialised and the device
+    handle looked up once; each read is a handful of in-process calls.
+
+    Args:
+        nvml: Module exposing the pynvml API. Defaults to `import pynvml`;
+              pass a stand-in module to run without a GPU.
+        index (int): Device index (default: 0).
+
+    Raises whatever nvmlInit raises (ImportError, NVMLError) when NVML is unusable.
+    """
+    source = "nvml"
+
+    def __init__(self, nvml=None, index=0):
+        super().__init__()
+        if nvml is None:
+            import pynvml as nvml  # type: ignore
+        self._nvml = nvml
+        nvml.nvmlInit()
+        try:
+            self._handle = nvml.nvmlDeviceGetHandleByIndex(index)
+        except Exception:
+            nvml.nvmlShutdown()
+            raise
+        self._name = None
+
+    def _read(self):
+        nvml, handle = self._nvml, self._handle
+        stats = {}
+        try:
+            stats["usage"] = float(nvml.nvmlDeviceGetUtilizationRates(handle).gpu)
+        except Exception:
+            pass
+        try:
+            stats["temp"] = float(nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU))
+        except Exception:
+            pass
+        try:
+            stats["clock"] = float(nvml.nvmlDeviceGetClockInfo(handle, nvml.NVML_CLOCK_SM))
+        except Exception:
+            pass
+        try:
+            mem = nvml.nvmlDeviceGetMemoryInfo(handle)
+            stats["mem_used_mb"] = round(mem.used / (1024 * 1024), 1)
+            stats["mem_total_mb"] = round(mem.total / (1024 * 1024), 1)
+        except Exception:
+            pass
+        return stats
+
+    def get_name(self):
+        if self._name is None:
+            try:
+                name = self._nvml.nvmlDeviceGetName(self._handle)
+                # Older pynvml releases return bytes
+                self._name = name.decode() if isinstance(name, bytes) else str(name)
+            except Exception:
+                self._name = "NVIDIA GPU"
+        return self._name
+
+    def close(self):
+        try:
+            self._nvml.nvmlShutdown()
+        except Exception:
+            pass
+
+
+class AmdSysfsGpuProvider(GpuProvider):
+    """
+    AMD provider reading the amdgpu sysfs files directly (Linux only).
+    The first amdgpu card is discovered once and its files are kept open,
+    so each read is a few pread() calls instead of a rocm-smi run.
+
+    Args:
+        sysfs_root (str): sysfs mount point (default: "/sys"). Point this at a
+                          fixture tree to run without the hardware.
+
+    Raises RuntimeError when no amdgpu card is found.
+    """
+    source = "amdgpu-sysfs"
+    AMD_VENDOR_ID = "0x1002"
+
+    def __init__(self, sysfs_root="/sys"):
+        super().__init__()
+        self.sysfs_root = sysfs_root
+        self.card = None
+        self._fds = {}
+        self._name = None
+        device = self._discover()
+        if device is None:
+            raise RuntimeError("no amdgpu card found")
+        self._open(device)
+
+    def _discover(self):
+        drm = os.path.join(self.sysfs_root, "class", "drm")
+        try:
+            cards = sorted(c for c in os.listdir(drm) if re.fullmatch(r"card\d+", c))
+        except OSError:
+            return None
+        for card in cards:
+            device = os.path.join(drm, card, "device")
+            if _read_text(os.path.join(device, "vendor")) != self.AMD_VENDOR_ID:
+                continue
+            if not os.path.exists(os.path.join(device, "gpu_busy_percent")):
+                continue
+            self.card = card
+            return device
+        return None
+
+    def _open(self, device):
+        paths = {
+            "usage": os.path.join(device, "gpu_busy_percent"),
+            "mem_used": os.path.join(device, "mem_info_vram_used"),
+            "mem_total": os.path.join(device, "mem_info_vram_total"),
+            "sclk_table": os.path.join(device, "pp_dpm_sclk"),
+        }
+        hwmon_dir = os.path.join(device, "hwmon")
+        try:
+            hwmons = sorted(os.listdir(hwmon_dir))
+        except OSError:
+            hwmons = []
+        for hwmon in hwmons:
+            base = os.path.join(hwmon_dir, hwmon)
+            temp = _pick_hwmon_input(base, "temp", preferred_label="edge")
+            if temp:
+                paths["temp"] = temp
+            freq = _pick_hwmon_input(base, "freq", preferred_label="sclk")
+            if freq:
+                paths["clock"] = freq
+            if temp:
+                break
+        for key, path in paths.items():
+            try:
+                self._fds[key] = os.open(path, os.O_RDONLY)
+            except OSError:
+                pass
+        self._name = _read_text(os.path.join(device, "product_name")) or None
+
+    def _pread(self, key):
+        fd = self._fds.get(key)
+        if fd is None:
+            return None
+        try:
+            return os.pread(fd, 4096, 0).decode(errors="replace").strip()
+        except OSError:
+            return None
+
+    def _read_int(self, key):
+        try:
+            return int(self._pread(key))
+        except (TypeError, ValueError):
+            return None
+
+    def _read(self):
+        stats = {}
+        usage = self._read_int("usage")
+        if usage is not None:
+            stats["usage"] = float(usage)
+        temp = self._read_int("temp")
+        if temp is not None:
+            stats["temp"] = temp / 1000.0  # millidegrees
+        clock = self._read_int("clock")
+        if clock is not None:
+            stats["clock"] = clock / 1e6  # Hz
+        else:
+            # pp_dpm_sclk lists the DPM states, the active one is starred: "1: 1200Mhz *"
+            table = self._pread("sclk_table") or ""
+            match = re.search(r"(\d+)\s*Mhz\s*\*", table, re.IGNORECASE)
+            if match:
+                stats["clock"] = float(match.group(1))
+        mem_used = self._read_int("mem_used")
+        mem_total = self._read_int("mem_total")
+        if mem_used is not None:
+            stats["mem_used_mb"] = round(mem_used / (1024 * 1024), 1)
+        if mem_total is not None:
+            stats["mem_total_mb"] = round(mem_total / (1024 * 1024), 1)
+        return stats
+
+    def get_name(self):
+        if self._name is None:
+            self._name = query_gpu_name("amd") if which("rocm-smi") else "AMD GPU"
+        return self._name
+
+    def close(self):
+        for fd in self._fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = {}
+
+
+class StreamingGpuProvider(GpuProvider):
+    """
+    Base for providers fed by a background reader thread. read() only returns
+    the latest cached value; the reader restarts its source with exponential
+    backoff whenever it exits.
+
+    Args:
+        interval_ms (int): Sampling period requested from the tool.
+        cmd (list): Command to run. Defaults to the real tool; tests can point
+                    this at a stub script.
+        stale_after (float): Seconds after which the cached value is dropped
+                             (default: 3 periods, at least 3 seconds).
+        max_backoff (float): Upper bound for the restart delay in seconds.
+    """
+    vendor = None
+    base_backoff = 1.0
+
+    def __init__(self, interval_ms=1000, cmd=None, stale_after=None, max_backoff=30.0):
+        super().__init__()
+        self.interval_ms = interval_ms
+        self.cmd = cmd or self.default_cmd(interval_ms)
+        self.stale_after = stale_after or max(3.0, 3 * interval_ms / 1000.0)
+        self.max_backoff = max_backoff
+        self.restarts = 0
+        self._failures = 0
+        self._latest = None
+        self._latest_ts = 0.0
+        self._name = None
+        self._proc = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"{self.source}-reader", daemon=True)
+        self._thread.start()
+
+    def default_cmd(self, interval_ms):
+        raise NotImplementedError
+
+    def read(self):
+        with self._lock:
+            if self._latest is None or time.monotonic() - self._latest_ts > self.stale_after:
+                return dict(EMPTY_STATS)
+            return dict(self._latest)
+
+    def _publish(self, stats):
+        if not stats:
+            return
+        with self._lock:
+            self._latest = dict(EMPTY_STATS, **stats)
+            self._latest_ts = time.monotonic()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                produced = self._run_once()
+            except Exception:
+                produced = False
+            if self._stop.is_set():
+                break
+            self.restarts += 1
+            self._failures = 0 if produced else self._failures + 1
+            delay = min(self.max_backoff, self.base_backoff * (2 ** self._failures))
+            self._stop.wait(delay)
+
+    def _run_once(self):
+        """Run the source until it exits. Returns True if it produced any data."""
+        raise NotImplementedError
+
+    def get_name(self):
+        if self._name is None:
+            self._name = query_gpu_name(self.vendor)
+        return self._name
+
+    def close(self):
+        self._stop.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+
+
+class NvidiaSmiStreamProvider(StreamingGpuProvider):
+    """
+    One long-lived `nvidia-smi --query-gpu=... -lms N` child process whose CSV
+    rows are parsed incrementally into the latest-value cache.
+    """
+    source = "nvidia-smi-stream"
+    vendor = "nvidia"
+
+    def default_cmd(self, interval_ms):
+        return ["nvidia-smi", "-i", "0",
+                "--query-gpu=utilization.gpu,temperature.gpu,clocks.sm,memory.used,memory.total",
+                "--format=csv,noheader,nounits", "-lms", str(interval_ms)]
+
+    def _run_once(self):
+        produced = False
+        try:
+            self._proc = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                          text=True, bufsize=1)
+        except OSError:
+            return False
+        try:
+            for line in self._proc.stdout:
+                if self._stop.is_set():
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                stats = parse_nvidia_csv(line)
+                if stats["usage"] is None and stats["temp"] is None:
+                    continue  # header or error text
+                self._publish(stats)
+                produced = True
+        finally:
+            if self._proc.poll() is None:
+                self._proc.terminate()
+            try:
+                self._proc.wait(timeout=1)
+            except Exception:
+                pass
+        return produced
+
+
+class RocmSmiLoopProvider(StreamingGpuProvider):
+    """
+    rocm-smi has no loop flag, so the reader thread runs one combined
+    `--showuse --showtemp --json` query per period. Callers never wait on it.
+    """
+    source = "rocm-smi-loop"
+    vendor = "amd"
+
+    def default_cmd(self, interval_ms):
+        return ["rocm-smi", "--showuse", "--showtemp", "--json"]
+
+    def _run_once(self):
+        produced = False
+        period = self.interval_ms / 1000.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            out = _run_cmd(self.cmd, timeout=max(1.0, period))
+            stats = parse_rocm_json(out) if out else None
+            if not stats:
+                return produced
+            self._publish(stats)
+            produced = True
+            self._stop.wait(max(0.0, period - (time.monotonic() - started)))
+        return produced
+
+
+def query_gpu_name(vendor):
+    """One-off product name lookup via nvidia-smi / rocm-smi."""
+    if vendor == "nvidia":
+        out = _run_cmd(["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"], timeout=0.5)
+        return out.splitlines()[0] if out else "NVIDIA GPU"
+    out = _run_cmd(["rocm-smi", "--showproductname"], timeout=0.5)
+    return out.splitlines()[-1] if out else "AMD GPU"
+
+def _read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _pick_hwmon_input(hwmon_path, kind, preferred_label=None):
+    """
+    Return the path of the `<kind>N_input` file in a hwmon directory, preferring
+    the one whose `<kind>N_label` matches `preferred_label`.
+    """
+    try:
+        names = sorted(os.listdir(hwmon_path))
+    except OSError:
+        return None
+    inputs = [n for n in names if re.fullmatch(rf"{kind}\d+_input", n)]
+    if not inputs:
+        return None
+    if preferred_label:
+        for name in inputs:
+            label = _read_text(os.path.join(hwmon_path, name.replace("_input", "_label")))
+            if label and label.lower() == preferred_label:
+                return os.path.join(hwmon_path, name)
+    return os.path.join(hwmon_path, inputs[0])
+
+def parse_nvidia_csv(line):
+    """Parse one 'usage, temp, clock, mem_used, mem_total' nvidia-smi CSV row."""
+    fields = [_to_float(f) for f in line.split(',')]
+    fields += [None] * (5 - len(fields))
+    return {
+        "usage": fields[0],
+        "temp": fields[1],
+        "clock": fields[2],
+        "mem_used_mb": fields[3],
+        "mem_total_mb": fields[4],
+    }
+
+def parse_rocm_json(text):
+    """Parse `rocm-smi --showuse --showtemp --json` output for the first card."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    # Newer rocm-smi keys cards as "card0", older builds use a "GPUs" list
+    gpus = data.get("GPUs") or [v for k, v in sorted(data.items()) if k.startswith("card")]
+    if not gpus:
+        return None
+    gpu = gpus[0]
+    stats = {"usage": _to_float(gpu.get("GPU use (%)"))}
+    temp_data = gpu.get("Temperature (Sensor)") or gpu.get("Temperature (Sensor edge) (C)")
+    if isinstance(temp_data, dict):
+        stats["temp"] = _to_float(temp_data.get("temp (C)"))
+    else:
+        stats["temp"] = _to_float(temp_data)
+    return stats
+
+
+# ---- Provider selection (once per process, re-checked while there is none) ----
+# PATH lookups are re-done after this many seconds, so a tool installed (or
+# removed) while the monitor runs is picked up without a restart
+WHICH_TTL = 300
+_which_cache = {}
+
+def which(cmd):
+    """True if `cmd` is on PATH (cached for WHICH_TTL seconds)."""
+    now = time.monotonic()
+    cached = _which_cache.get(cmd)
+    if cached is None or now - cached[1] >= WHICH_TTL:
+        cached = _which_cache[cmd] = (shutil.which(cmd) is not None, now)
+    return cached[0]
+
+_provider = None
+_provider_checked = False
+_provider_lock = threading.Lock()
+
+def create_gpu_provider(interval_ms=1000):
+    """
+    Pick the cheapest available backend: NVML, then a streaming nvidia-smi
+    reader, then amdgpu sysfs, then a rocm-smi reader sampling every `interval_ms`.
+    """
+    try:
+        return NvmlGpuProvider()
+    except Exception:
+        pass
+    if which("nvidia-smi"):
+        return NvidiaSmiStreamProvider(interval_ms=interval_ms)
+    if platform.system() == "Linux":
+        try:
+            return AmdSysfsGpuProvider()
+        except Exception:
+            pass
+    if platform.system() == "Linux" and which("rocm-smi"):
+        return RocmSmiLoopProvider(interval_ms=interval_ms)
+    return None
+
+def get_gpu_provider():
+    """Return the shared GPU provider, or None if no GPU backend is available."""
+    global _provider, _provider_checked
+    if not _provider_checked:
+        with _provider_lock:
+            if not _provider_checked:
+                _provider = create_gpu_provider()
+                _provider_checked = True
+    return _provider
+
+def recheck_gpu_provider():
+    """
+    Forget a "no GPU backend" result so the next get_gpu_provider() selects
+    again (a working provider is kept). Meant for a breaker's half-open trial.
+    """
+    global _provider_checked
+    with _provider_lock:
+        if _provider is None:
+            _provider_checked = False
+
+def set_gpu_provider(provider):
+    """Replace the shared provider (closing the old one)."""
+    global _provider, _provider_checked
+    with _provider_lock:
+        if _provider is not None and _provider is not provider:
+            _provider.close()
+        _provider = provider
+        _provider_checked = True
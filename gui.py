@@ -2,8 +2,8 @@ import tkinter as tk
 from tkinter import Toplevel
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
-import threading
 import queue
+import asyncio
 from screeninfo import get_monitors
 import os
 import sys
@@ -17,6 +17,9 @@ from crt_graphics import CRTGrapher, ThreadedDataFetcher
 from metrics_layout import build_metrics
 from startup_loader import startup_loader
 import monitor_core as core
+import latency_core
+import collector_core
+import flight_recorder
 from PIL import Image, ImageTk
 #from ico_test_file import flash_image
 
@@ -257,6 +260,12 @@ current_color_scheme = {} # Will be set by load_config and update_color_scheme
 network_controller = None
 # =========================================
 
+# Continuous background latency prober (latency_core.LatencyMonitor)
+latency_monitor = None
+collectors = None
+# Ring buffer of recent high-rate samples, dumped when smart focus fires
+recorder = None
+
 # -- relative path function for packaging
 def resource_path(rel_path):
     """Return path to resource (works for script and PyInstaller onedir)."""
@@ -479,6 +488,10 @@ def smart_focus_check(cpu_usage=0, cpu_temp=None, gpu_temp=None, latency=None):
         reason = f"High latency: {latency:.0f}ms"
         focus_triggered = True
     
+    # Keep the evidence: the recorder dumps the seconds around this moment
+    if focus_triggered and recorder:
+        recorder.trigger(reason)
+    
     # Only switch if target is within main 4 tabs and different from current
     if focus_triggered and target_tab < MAIN_TABS_COUNT and get_current_tab() != target_tab:
         set_current_tab(target_tab)
@@ -849,13 +862,14 @@ def _update_metric_display(key, history):
 
     lbl, bar, cvs, maxv, overlay_lbl = widgets[key]
     lbl_color = get_usage_color(val)
+    snap = core.get_last_snapshot()
 
     if key == "CPU":
         freq_tuple = core.get_cpu_freq()
         freq_text = f"{freq_tuple[0]:>4.2f} GHz" if freq_tuple and freq_tuple[0] else " N/A "
         lbl.config(foreground=lbl_color, text=f"CPU Usage: {val:>5.1f}%  CPU Speed: {freq_text}")
     elif key == "RAM":
-        ram_info = core.get_ram_info()
+        ram_info = snap.ram_info if snap else core.get_ram_info()
         used = ram_info.get('used', 0)
         avail = ram_info.get('available', 0)
         lbl.config(foreground=lbl_color, text=f"RAM used {used:>5.2f} GB / free {avail:>5.2f} GB")
@@ -865,12 +879,13 @@ def _update_metric_display(key, history):
             overlay_lbl.config(text=display_text, background=lbl_color, foreground="black")
             overlay_lbl.place_configure(relx=new_relx)
     else: # GPU
-        gpu_clocks = core.get_gpu_clock_speed()
+        gpu_clocks = snap.gpu_clock if snap else core.get_gpu_clock_speed()
         lbl.config(foreground=lbl_color, text=f"{key} Usage: {val:>5.1f}%  GPU Speed: {gpu_clocks} MHz")
 
     style.configure(bar._style_name, background=lbl_color)
     bar["value"] = val
-    crt_grapher.draw_metric(cvs, history[key], maxv, color=lbl_color)
+    peak = history.get(f"{key}_max") if SAMPLE_HZ else None
+    crt_grapher.draw_metric(cvs, history[key], maxv, color=lbl_color, peak=peak)
 
 def update_gui():
     global latest_history
@@ -903,160 +918,257 @@ def update_gui():
                 pass
             
             # Trigger smart focus check with current values
+            # Temperatures come from the fetcher's snapshot, not a fresh sensor read
             cpu_usage = history.get("CPU", [0])[-1]
-            cpu_temp = core.get_cpu_temp()
-            gpu_temp = core.get_gpu_temp()
+            snap = core.get_last_snapshot()
+            cpu_temp = snap.cpu_temp if snap else None
+            gpu_temp = snap.gpu_temp if snap else None
             latency = network_results.get('avg_latency_ms')
             smart_focus_check(cpu_usage, cpu_temp, gpu_temp, latency)
+
+            # Per-core bars only repaint while the Processing Stats tab is showing
+            current_tab = widgets["notebook"].index("current")
+            if history.get("CORE_busy") and current_tab == 1:
+                crt_grapher.draw_core_bars(widgets["CPU Stats"]["Core Bars"], history["CORE_busy"],
+                                           history.get("CORE_peak"))
+            if snap and current_tab == 2:
+                update_nic_table(snap.nics)
+                update_tcp_health(history)
             
     except queue.Empty:
         pass
     finally:
         root.after(REFRESH_GUI_MS, update_gui)
 
-def update_heavy_stats():
-    def worker():
-        try:
-            # Get process count from config
-            process_limit = CONFIG.get("process_count", 5)
-            
-            # Fetch all data in the background
-            cpu_info = core.get_cpu_info()
-            freq_tuple = core.get_cpu_freq()
-            gpu_info = core.get_gpu_info() or "N/A"
-            disk_use = core.get_disk_summary()
-            cpu_temp = core.get_cpu_temp()
-            gpu_temp = core.get_gpu_temp()
-            gpu_clocks = core.get_gpu_clock_speed()
-            procs = core.get_top_processes(limit=process_limit)
-            load_avg = core.get_load_average()
-            uptime = core.get_uptime()
-
-            def apply_updates():
-                # --- Sys Info Tab ---
-                info_labels = widgets["Sys Info"]
-                info_labels["CPU Model"].config(text=f"CPU Model: {cpu_info.get('model', 'N/A')}")
-                cores = cpu_info.get('physical_cores', 'N/A')
-                threads = cpu_info.get('logical_cores', 'N/A')
-                turbo_pct = ((freq_tuple[0] - freq_tuple[2]) / freq_tuple[2]) * 100
-                info_labels["Cores"].config(text=f"{freq_tuple[2]} BASE SPEED | {turbo_pct:+.1f}% CORE MAX | {cores} CORES | {threads} THREADS")
-                info_labels["GPU"].config(text=f"GPU: {gpu_info} | {gpu_clocks} Mhz")
-                info_labels["DISK"].config(text=f"DISK USAGE: {disk_use}")
-                info_labels["Uptime"].config(text=f"Uptime: {uptime}")
-
-                # --- Network & Latency ---
-                net_in = network_results['in_MB']
-                net_out = network_results['out_MB']
-                lat = network_results['avg_latency_ms']
-                iface = network_results['interface_name']
-
-                # ===== NETWORK TAB INTEGRATION: Only update if in normal mode =====
-                if info_labels.get("LatencyMode", "normal") == "normal":
-                    info_labels["NetPrefix"].config(
-                        text = f"Net Down/Upload:", 
-                        foreground=get_latency_color(lat)
-                    )
-                    info_labels["Net IN"].config(
-                        text=f"{net_in:.2f}🡫",
-                        foreground=get_net_color(net_in)
-                    )
-                    info_labels["Net OUT"].config(
-                        text=f"{net_out:.2f}🡩",
-                        foreground=get_net_color(net_out)
-                    )
-                    info_labels["NetSuffix"].config(
-                        text = f"MBs", 
-                        foreground=get_latency_color(lat)
-                    )
-
-                    lat_text = f"{iface} Latency: {lat:>5.1f} ms" if lat is not None else "Latency:     N/A"
-                    info_labels["Latency"].config(
-                        text=lat_text,
-                        foreground=get_latency_color(lat)
-                    )
-                # ==================================================================
-                                
-                # --- Processing Stats Tab (COLORIZED VERSION) ---
-                cpu_labels = widgets["CPU Stats"]
-                cpu_labels["Info"].config(text=f"CPU Load Avg: {load_avg}   Uptime: {uptime}")
-
-                # Colorize the process list using Text widget
-                proc_widget = cpu_labels["Top Processes"]
-                proc_widget.configure(state="normal")
-                proc_widget.delete("1.0", "end")
-
-                # Insert header without color
-                header = "PID      USER      VIRT  RES   CPU%   MEM%   NAME\n"
-                proc_widget.insert("end", header)
-
-                # Insert each process line with color based on CPU usage
-                for proc_line in procs:
-                    cpu_pct = parse_cpu_from_process_line(proc_line)
-                    color = get_usage_color(cpu_pct)
-                    
-                    # Create unique tag for this line
-                    tag_name = f"cpu_{cpu_pct}_{id(proc_line)}"
-                    proc_widget.insert("end", proc_line + "\n", tag_name)
-                    proc_widget.tag_config(tag_name, foreground=color)
+# Last values rendered per NIC row, so unchanged rows aren't touched
+nic_table_rows = {}
+
+def update_nic_table(nics):
+    """Sync the Network Stats NIC table, editing only rows whose text changed."""
+    table = widgets["Sys Info"].get("NicTable")
+    if table is None:
+        return
+    for nic in list(nic_table_rows):
+        if nic not in nics:
+            table.delete(nic)
+            del nic_table_rows[nic]
+    for nic in sorted(nics):
+        r = nics[nic]
+        values = (f"{r['recv_mb']:.2f}", f"{r['sent_mb']:.2f}",
+                  f"{r['errors']:.1f}", f"{r['drops']:.1f}")
+        if nic not in nic_table_rows:
+            table.insert("", "end", iid=nic, text=nic, values=values)
+        elif nic_table_rows[nic] != values:
+            table.item(nic, values=values)
+        nic_table_rows[nic] = values
+
+def update_tcp_health(history):
+    """Latest kernel retransmit / out-of-order / drop rates on the Network Stats tab."""
+    label = widgets["Sys Info"].get("TcpHealth")
+    retrans = history.get("TCP_retrans", [])
+    if label is None or not retrans:
+        return
+    ooo = history.get("TCP_ooo", [0])[-1]
+    drops = history.get("TCP_listen_drops", [0])[-1] + history.get("UDP_rcvbuf_err", [0])[-1]
+    # Any sustained retransmits or drops show up here before latency moves
+    color = get_color('danger') if drops > 0 else get_color('warning') if retrans[-1] > 0 else get_color('success')
+    label.config(text=f"TCP retx {retrans[-1]:.1f}/s  ooo {ooo:.1f}/s  drop {drops:.1f}/s", foreground=color)
+
+def _busy_pids(lines):
+    """Pids of the listed processes using at least 1% CPU (idle ties reshuffle freely)."""
+    return frozenset(line.split(None, 1)[0] for line in lines if parse_cpu_from_process_line(line) >= 1.0)
+
+def start_collectors():
+    """Register the slow collectors; intervals adapt from these staleness targets."""
+    global collectors
+    heavy = REFRESH_HEAVY_MS / 1000
+    collectors = collector_core.AdaptiveScheduler(cpu_budget=COLLECTOR_CPU_BUDGET,
+                                                  status_path=collector_core.STATUS_FILE)
+    # Static for the life of the process: one early read, then rare re-checks
+    collectors.register("cpu_info", core.get_cpu_info, staleness=60, max_interval=3600)
+    # GPU name can shell out to nvidia-smi/rocm-smi; give it the longest deadline
+    collectors.register("gpu_info", core.get_gpu_info, staleness=60, max_interval=3600,
+                        timeout=10)
+    collectors.register("disk_summary", core.get_disk_summary, staleness=30, max_interval=600)
+    # Moving values
+    collectors.register("cpu_freq", core.get_cpu_freq, staleness=heavy)
+    collectors.register("load_avg", core.get_load_average, staleness=heavy)
+    # CPU% figures differ on every scan; only a change in which processes are
+    # actually busy counts. Never polled faster than the widgets read it, and
+    # never left older than `heavy`, since the CPU% is read directly
+    collectors.register("processes", lambda: core.get_top_processes(limit=CONFIG.get("process_count", 5)),
+                        staleness=heavy, min_interval=REFRESH_SLOW_MS / 1000, max_interval=heavy,
+                        change_key=_busy_pids)
+    collectors.register("uptime", core.get_uptime, staleness=1, min_interval=1)
+    collectors.start()
 
-                proc_widget.configure(state="disabled")
+def update_heavy_stats():
+    """Push the latest collector values to the widgets (no collection here)."""
+    try:
+        if collectors.get("cpu_info") is None or collectors.get("cpu_freq") is None:
+            return
+        cpu_info = collectors.get("cpu_info")
+        freq_tuple = collectors.get("cpu_freq")
+        gpu_info = collectors.get("gpu_info") or "N/A"
+        disk_use = collectors.get("disk_summary", "N/A")
+        # Temperatures and clocks come from the fetcher's 1 Hz snapshot as-is
+        snap = core.get_last_snapshot()
+        cpu_temp, gpu_temp, gpu_clocks = (snap.cpu_temp, snap.gpu_temp, snap.gpu_clock) if snap else (None, None, "N/A")
+        procs = collectors.get("processes", [])
+        load_avg = collectors.get("load_avg", "N/A")
+        uptime = collectors.get("uptime", "N/A")
+
+        def apply_updates():
+            # --- Sys Info Tab ---
+            info_labels = widgets["Sys Info"]
+            info_labels["CPU Model"].config(text=f"CPU Model: {cpu_info.get('model', 'N/A')}")
+            cores = cpu_info.get('physical_cores', 'N/A')
+            threads = cpu_info.get('logical_cores', 'N/A')
+            turbo_pct = ((freq_tuple[0] - freq_tuple[2]) / freq_tuple[2]) * 100
+            info_labels["Cores"].config(text=f"{freq_tuple[2]} BASE SPEED | {turbo_pct:+.1f}% CORE MAX | {cores} CORES | {threads} THREADS")
+            # A collector past its deadline keeps showing its last value, flagged
+            gpu_stale = " (stale)" if collectors.is_stale("gpu_info") else ""
+            disk_stale = " (stale)" if collectors.is_stale("disk_summary") else ""
+            info_labels["GPU"].config(text=f"GPU: {gpu_info} | {gpu_clocks} Mhz{gpu_stale}")
+            info_labels["DISK"].config(text=f"DISK USAGE: {disk_use}{disk_stale}")
+            info_labels["Uptime"].config(text=f"Uptime: {uptime}")
+
+            # --- Network & Latency ---
+            net_in = network_results['in_MB']
+            net_out = network_results['out_MB']
+            lat = network_results['avg_latency_ms']
+            iface = network_results['interface_name']
+
+            # ===== NETWORK TAB INTEGRATION: Only update if in normal mode =====
+            if info_labels.get("LatencyMode", "normal") == "normal":
+                info_labels["NetPrefix"].config(
+                    text = f"Net Down/Upload:", 
+                    foreground=get_latency_color(lat)
+                )
+                info_labels["Net IN"].config(
+                    text=f"{net_in:.2f}🡫",
+                    foreground=get_net_color(net_in)
+                )
+                info_labels["Net OUT"].config(
+                    text=f"{net_out:.2f}🡩",
+                    foreground=get_net_color(net_out)
+                )
+                info_labels["NetSuffix"].config(
+                    text = f"MBs", 
+                    foreground=get_latency_color(lat)
+                )
+
+                lat_text = f"{iface} Latency: {lat:>5.1f} ms" if lat is not None else "Latency:     N/A"
+                windows = network_results.get('latency')
+                if lat is not None and windows:
+                    short, long_ = windows["1m"], windows["15m"]
+                    # Arrow when the last minute's tail is well above the 15-minute norm
+                    trend = " ▲" if short["p95"] and long_["p95"] and short["p95"] > long_["p95"] * 1.5 else ""
+                    lat_text += f" | p95 {short['p95']:.0f} | {short['loss']:.0f}% loss{trend}"
+                info_labels["Latency"].config(
+                    text=lat_text,
+                    foreground=get_latency_color(lat)
+                )
+            # ==================================================================
+                            
+            # --- Processing Stats Tab (COLORIZED VERSION) ---
+            cpu_labels = widgets["CPU Stats"]
+            cpu_labels["Info"].config(text=f"CPU Load Avg: {load_avg}   Uptime: {uptime}")
+
+            # Colorize the process list using Text widget
+            proc_widget = cpu_labels["Top Processes"]
+            proc_widget.configure(state="normal")
+            proc_widget.delete("1.0", "end")
+
+            # Insert header without color
+            header = "PID      USER      VIRT  RES   CPU%   MEM%   NAME\n"
+            proc_widget.insert("end", header)
+
+            # Insert each process line with color based on CPU usage
+            for proc_line in procs:
+                cpu_pct = parse_cpu_from_process_line(proc_line)
+                color = get_usage_color(cpu_pct)
                 
-                # --- Temperature Stats Tab ---
-                if "Temp Stats" in widgets:
-                    temp_widgets = widgets["Temp Stats"]
+                # Create unique tag for this line
+                tag_name = f"cpu_{cpu_pct}_{id(proc_line)}"
+                proc_widget.insert("end", proc_line + "\n", tag_name)
+                proc_widget.tag_config(tag_name, foreground=color)
 
-                    if "Temp_Label" in temp_widgets:
-                        cpu_text = f"{cpu_temp:.0f}°C" if cpu_temp is not None else "... °C"
-                        gpu_text = f"{gpu_temp:.0f}°C" if gpu_temp is not None else "... °C"
+            proc_widget.configure(state="disabled")
+            
+            # --- Temperature Stats Tab ---
+            if "Temp Stats" in widgets:
+                temp_widgets = widgets["Temp Stats"]
 
-                        temp_widgets["Temp_Label"].configure(state="normal")
-                        temp_widgets["Temp_Label"].delete("1.0", "end")
+                if "Temp_Label" in temp_widgets:
+                    cpu_text = f"{cpu_temp:.0f}°C" if cpu_temp is not None else "... °C"
+                    gpu_text = f"{gpu_temp:.0f}°C" if gpu_temp is not None else "... °C"
 
-                        temp_widgets["Temp_Label"].insert("end", f"CPU: {cpu_text}", "cpu")
-                        temp_widgets["Temp_Label"].insert("end", " | ")
-                        temp_widgets["Temp_Label"].insert("end", f"GPU: {gpu_text}", "gpu")
+                    temp_widgets["Temp_Label"].configure(state="normal")
+                    temp_widgets["Temp_Label"].delete("1.0", "end")
 
-                        temp_widgets["Temp_Label"].tag_config("cpu", foreground=CRT_GREEN)
-                        temp_widgets["Temp_Label"].tag_config("gpu", foreground="white")
+                    temp_widgets["Temp_Label"].insert("end", f"CPU: {cpu_text}", "cpu")
+                    temp_widgets["Temp_Label"].insert("end", " | ")
+                    temp_widgets["Temp_Label"].insert("end", f"GPU: {gpu_text}", "gpu")
 
-                        temp_widgets["Temp_Label"].configure(state="disabled")
+                    temp_widgets["Temp_Label"].tag_config("cpu", foreground=CRT_GREEN)
+                    temp_widgets["Temp_Label"].tag_config("gpu", foreground="white")
 
-            root.after(0, apply_updates)
-        except Exception as e:
-            print(f"Heavy stats worker error: {e}")
-        finally:
-            root.after(REFRESH_HEAVY_MS, update_heavy_stats)
-    threading.Thread(target=worker, daemon=True).start()
+                    temp_widgets["Temp_Label"].configure(state="disabled")
+
+        apply_updates()
+    except Exception as e:
+        print(f"Heavy stats update error: {e}")
+    finally:
+        root.after(REFRESH_SLOW_MS, update_heavy_stats)
+
+def _recorder_latency():
+    """Current 1-minute p50 latency (ms) for the flight recorder, as the alert sees it."""
+    stats = latency_monitor.stats(PING_HOST) if latency_monitor else None
+    return stats["1m"]["p50"] if stats else None
+
+def start_latency_monitor():
+    """Start continuous background probing of PING_HOST."""
+    global latency_monitor
+    probe = None
+    if not latency_core.icmp_available():
+        # No unprivileged ICMP sockets (e.g. Windows): one system ping per tick
+        async def probe(host):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, core.ping_host, host, 1, 2)
+    latency_monitor = latency_core.LatencyMonitor([PING_HOST], probe=probe)
+    latency_monitor.start()
 
 def update_network_stats():
-    def worker():
-        global network_results
-        try:
-            # net_usage_latency now returns 5 values: (net_in, net_out, latency, interface_name, connection_type)
-            net_in, net_out, avg_latency, interface_name, connection_type = core.net_usage_latency(
-                interface=NETWORK_INTERFACE,
-                ping_target=PING_HOST,
-                ping_count=PING_COUNT
-            )
-            network_results = {
-                "in_MB": net_in, 
-                "out_MB": net_out, 
-                "avg_latency_ms": avg_latency,
-                "interface_name": interface_name,
-                "connection_type": connection_type
-            }
-        except Exception as e:
-            print(f"Network stats error: {e}")
-            network_results = {
-                "in_MB": 0.0, 
-                "out_MB": 0.0, 
-                "avg_latency_ms": None,
-                "interface_name": None,
-                "connection_type": None
-            }
-        finally:
-            root.after(REFRESH_SLOW_MS, update_network_stats)
-    threading.Thread(target=worker, daemon=True).start()
+    global network_results
+    try:
+        # Rates come from the shared tracker and latency from the background
+        # monitor, so nothing here blocks
+        net_in, net_out, _, interface_name, connection_type = core.net_usage_latency(
+            interface=NETWORK_INTERFACE,
+            measure_latency=False
+        )
+        latency = latency_monitor.stats(PING_HOST) if latency_monitor else None
+        network_results = {
+            "in_MB": net_in, 
+            "out_MB": net_out, 
+            "avg_latency_ms": latency["1m"]["p50"] if latency else None,
+            "latency": latency,
+            "interface_name": interface_name,
+            "connection_type": connection_type
+        }
+    except Exception as e:
+        print(f"Network stats error: {e}")
+        network_results = {
+            "in_MB": 0.0, 
+            "out_MB": 0.0, 
+            "avg_latency_ms": None,
+            "latency": None,
+            "interface_name": None,
+            "connection_type": None
+        }
+    finally:
+        root.after(REFRESH_SLOW_MS, update_network_stats)
 
 def update_time():
     date_lbl, time_lbl = widgets["Time & Uptime"]
@@ -1133,6 +1245,15 @@ def integrate_network_tab():
         )
         ping_btn.grid(row=0, column=2, sticky="e", padx=(0, 2))
 
+        # Sweep button (all servers at once)
+        sweep_btn = tb.Button(
+            server_select_frame,
+            text="Sweep",
+            bootstyle="success-outline",
+            width=8
+        )
+        sweep_btn.grid(row=0, column=3, sticky="e", padx=(0, 2))
+
         # Config button
         config_btn = tb.Button(
             server_select_frame,
@@ -1140,7 +1261,7 @@ def integrate_network_tab():
             bootstyle="success-outline",
             width=3
         )
-        config_btn.grid(row=0, column=3, sticky="e")
+        config_btn.grid(row=0, column=4, sticky="e")
 
         # Status label
         ping_status_lbl = tb.Label(
@@ -1182,6 +1303,7 @@ def integrate_network_tab():
         info_labels["ServerCombo"] = server_combo
         info_labels["SelectedServer"] = selected_server
         info_labels["PingButton"] = ping_btn
+        info_labels["SweepButton"] = sweep_btn
         info_labels["PingStatus"] = ping_status_lbl
         info_labels["ResultsText"] = results_text
         info_labels["ConfigButton"] = config_btn
@@ -1193,6 +1315,7 @@ def integrate_network_tab():
         
         # Wire up commands
         ping_btn.config(command=controller.run_server_ping_test)
+        sweep_btn.config(command=controller.run_server_sweep)
         config_btn.config(command=controller.open_server_config)
         
         # Load servers
@@ -1211,10 +1334,15 @@ def integrate_network_tab():
 # ==== Application Start
 # ==============================================================================
 def start_app():
-    global network_controller, scanline_overlay
+    global network_controller, scanline_overlay, recorder
     
-    data_fetcher = ThreadedDataFetcher(data_queue, interval=REFRESH_MS / 1000)
+    data_fetcher = ThreadedDataFetcher(data_queue, interval=REFRESH_MS / 1000, sample_hz=SAMPLE_HZ)
     data_fetcher.start()
+    recorder = flight_recorder.FlightRecorder(latency=_recorder_latency,
+                                              processes=lambda: collectors.get("processes") if collectors else None)
+    recorder.start()
+    start_latency_monitor()
+    start_collectors()
     update_network_stats()
     update_heavy_stats()
     update_time()
@@ -1253,6 +1381,15 @@ def on_app_close():
     if network_controller:
         network_controller.shutdown()
     
+    if latency_monitor:
+        latency_monitor.stop()
+    
+    if collectors:
+        collectors.stop()
+    
+    if recorder:
+        recorder.stop()
+    
     root.destroy()
 
 if __name__ == "__main__":
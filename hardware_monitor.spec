@@ -30,6 +30,8 @@ gui_analysis = Analysis(
         'metrics_layout', 
         'startup_loader', 
         'monitor_core', 
+        'gpu_core',
+        'process_core', 'latency_core', 'tcp_core', 'net_core', 'latency_store', 'collector_core', 'flight_recorder',
     ],
     hookspath=[],
     hooksconfig={},
@@ -63,6 +65,8 @@ startup_analysis = Analysis(
         'metrics_layout', 
         'startup_loader', 
         'monitor_core',
+        'gpu_core',
+        'process_core', 'latency_core', 'tcp_core', 'net_core', 'latency_store', 'collector_core', 'flight_recorder',
         'debug_core.py', 
     ],
     hookspath=[],
@@ -0,0 +1,708 @@
+"""
+Latency Prober
+Native asyncio replacement for forking the system `ping`. Probes go out
+over unprivileged ICMP datagram sockets (Linux ping_group_range, macOS),
+falling back to UDP echo, and every probe is timestamped individually so
+a whole burst finishes in roughly one RTT plus the send spacing.
+"""
+
+import asyncio
+import bisect
+import ipaddress
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+# ICMP echo request/reply types per address family
+ICMP_ECHO = {socket.AF_INET: (8, 0), socket.AF_INET6: (128, 129)}
+# Standard echo service port (RFC 862) used by the UDP fallback
+UDP_ECHO_PORT = 7
+# Default spacing between probes in a burst (seconds)
+PROBE_INTERVAL = 0.02
+# How long to wait for the last probe's reply (seconds)
+PROBE_TIMEOUT = 1.0
+PAYLOAD_PAD = b"PyMonCRT" * 4
+
+_icmp_available = {}
+
+
+def icmp_available(family=socket.AF_INET):
+    """True if this process may open an unprivileged ICMP datagram socket."""
+    if family not in _icmp_available:
+        try:
+            sock = _open_icmp_socket(family)
+            sock.close()
+            _icmp_available[family] = True
+        except OSError:
+            _icmp_available[family] = False
+    return _icmp_available[family]
+
+def _open_icmp_socket(family):
+    proto = socket.IPPROTO_ICMP if family == socket.AF_INET else socket.IPPROTO_ICMPV6
+    sock = socket.socket(family, socket.SOCK_DGRAM, proto)
+    sock.setblocking(False)
+    return sock
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def build_echo_request(family, seq, token):
+    """ICMP echo request; the kernel rewrites the identifier on datagram sockets."""
+    req_type = ICMP_ECHO[family][0]
+    payload = token + PAYLOAD_PAD
+    header = struct.pack("!BBHHH", req_type, 0, 0, 0, seq)
+    csum = _checksum(header + payload) if family == socket.AF_INET else 0
+    return struct.pack("!BBHHH", req_type, 0, csum, 0, seq) + payload
+
+def parse_echo_reply(family, data):
+    """Returns (seq, token) for an echo reply, or None for anything else."""
+    # macOS delivers the IPv4 header on ICMP datagram sockets, Linux doesn't
+    if family == socket.AF_INET and data and data[0] >> 4 == 4:
+        data = data[(data[0] & 0x0F) * 4:]
+    if len(data) < 12:
+        return None
+    reply_type, _, _, _, seq = struct.unpack("!BBHHH", data[:8])
+    if reply_type != ICMP_ECHO[family][1]:
+        return None
+    return seq, data[8:12]
+
+
+class _ProbeProtocol(asyncio.DatagramProtocol):
+    """Matches replies to outstanding probes and stamps their arrival."""
+
+    def __init__(self, parse):
+        self.parse = parse
+        self.pending = {}
+
+    def datagram_received(self, data, addr):
+        received = time.perf_counter_ns()
+        match = self.parse(data)
+        if match is None:
+            return
+        waiter = self.pending.pop(match, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(received)
+
+    def error_received(self, exc):
+        # ICMP unreachable on a connected UDP socket; the probe just times out
+        pass
+
+
+# ---- DNS pre-resolution ----
+# Seconds a resolved address is reused before it's looked up again
+# (getaddrinfo doesn't expose record TTLs, so this is a fixed ceiling)
+DNS_TTL = 300.0
+
+class ResolverCache:
+    """
+    Hostname -> address cache shared by every probe. Lookups run through the
+    event loop's getaddrinfo, so many hosts resolve in parallel; entries are
+    refreshed once older than `ttl`, and a stale address keeps being served
+    if the refresh fails.
+
+    Args:
+        ttl (float): Seconds before an entry is re-resolved (default: DNS_TTL).
+    """
+
+    def __init__(self, ttl=DNS_TTL):
+        self.ttl = ttl
+        self._entries = {}  # host -> (family, sockaddr, resolve_ms, resolved_at)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def is_literal(cls, host):
+        """True if host is already an IP address (never looked up)."""
+        return bool(host) and cls._literal(host) is not None
+
+    @staticmethod
+    def _literal(host):
+        try:
+            addr = ipaddress.ip_address(host.split("%")[0])
+        except ValueError:
+            return None
+        if addr.version == 4:
+            return socket.AF_INET, (host, 0)
+        return socket.AF_INET6, (host, 0, 0, 0)
+
+    def lookup(self, host):
+        """Cached (family, sockaddr, resolve_ms, resolved_at) or None; never blocks."""
+        with self._lock:
+            return self._entries.get(host)
+
+    def address(self, host):
+        """Cached IP for a host (the host itself if unknown or already an IP)."""
+        entry = self.lookup(host)
+        return entry[1][0] if entry else host
+
+    async def resolve(self, host):
+        """
+        Returns (family, sockaddr, resolve_ms, cached). resolve_ms is the time
+        of the lookup that produced the address (None for IP literals);
+        cached is False only when this call did the lookup.
+        """
+        literal = self._literal(host)
+        if literal:
+            return literal + (None, True)
+
+        entry = self.lookup(host)
+        if entry and time.monotonic() - entry[3] < self.ttl:
+            return entry[:3] + (True,)
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            infos = await loop.getaddrinfo(host, None, type=socket.SOCK_DGRAM)
+        except OSError:
+            if entry:
+                return entry[:3] + (True,)  # stale beats nothing
+            raise
+        resolve_ms = round((time.perf_counter() - started) * 1000, 2)
+        # Prefer IPv4 when both exist, matching what `ping` does by default
+        infos.sort(key=lambda info: info[0] != socket.AF_INET)
+        family, sockaddr = infos[0][0], infos[0][4]
+        with self._lock:
+            self._entries[host] = (family, sockaddr, resolve_ms, time.monotonic())
+        return family, sockaddr, resolve_ms, False
+
+    async def prefetch(self, hosts):
+        """Resolve many hosts concurrently; returns {host: resolve_ms or None on failure}."""
+        hosts = [h for h in dict.fromkeys(hosts) if h]
+        results = await asyncio.gather(*(self.resolve(h) for h in hosts), return_exceptions=True)
+        return {h: (None if isinstance(r, BaseException) else r[2]) for h, r in zip(hosts, results)}
+
+
+_resolver = ResolverCache()
+
+def get_resolver_cache():
+    """Process-wide ResolverCache used by all probes."""
+    return _resolver
+
+async def _resolve(host):
+    family, sockaddr, _, _ = await _resolver.resolve(host)
+    return family, sockaddr
+
+def _attach_dns(stats, resolved):
+    """Report name resolution separately from the RTT figures."""
+    if stats is not None:
+        stats["resolve_ms"] = resolved[2]
+        stats["dns_cached"] = resolved[3]
+    return stats
+
+async def probe_host(host, count=10, interval=PROBE_INTERVAL, timeout=PROBE_TIMEOUT,
+                     method="auto", port=UDP_ECHO_PORT):
+    """
+    Send `count` echo probes to `host` and collect per-probe RTTs.
+
+    Args:
+        host (str): Hostname or IP address.
+        count (int): Number of probes (default: 10).
+        interval (float): Spacing between sends; replies aren't awaited in between.
+        timeout (float): Wait for each reply, measured from its send.
+        method (str): "icmp", "udp" or "auto" (ICMP if permitted, else UDP echo).
+        port (int): Destination port for UDP echo (default: 7).
+
+    Returns:
+        list: RTT in ms per probe, None for lost probes.
+    """
+    family, sockaddr = await _resolve(host)
+    if method == "auto":
+        method = "icmp" if icmp_available(family) else "udp"
+
+    loop = asyncio.get_running_loop()
+    token = os.urandom(4)
+    if method == "icmp":
+        protocol = _ProbeProtocol(lambda data: parse_echo_reply(family, data))
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: protocol, sock=_open_icmp_socket(family))
+        target = (sockaddr[0], 0) + tuple(sockaddr[2:])
+        make = lambda seq: build_echo_request(family, seq, token)
+    else:
+        def parse_udp(data):
+            if len(data) < 6:
+                return None
+            tok, seq = struct.unpack("!4sH", data[:6])
+            return seq, tok
+        protocol = _ProbeProtocol(parse_udp)
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: protocol, remote_addr=(sockaddr[0], port), family=family)
+        target = None
+        make = lambda seq: struct.pack("!4sH", token, seq) + PAYLOAD_PAD
+
+    sent = []
+    try:
+        for i in range(count):
+            seq = (i + 1) & 0xFFFF
+            waiter = loop.create_future()
+            protocol.pending[(seq, token)] = waiter
+            packet = make(seq)
+            started = time.perf_counter_ns()
+            try:
+                transport.sendto(packet, target) if target else transport.sendto(packet)
+            except OSError:
+                waiter.cancel()
+            sent.append((started, waiter))
+            if i + 1 < count:
+                await asyncio.sleep(interval)
+
+        rtts = []
+        for started, waiter in sent:
+            # Every probe gets the full timeout from its own send time
+            remaining = timeout - (time.perf_counter_ns() - started) / 1e9
+            try:
+                received = await asyncio.wait_for(asyncio.shield(waiter), max(0.0, remaining))
+                rtts.append((received - started) / 1e6)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                rtts.append(None)
+        return rtts
+    finally:
+        transport.close()
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a non-empty list (pct in 0-100)."""
+    return percentile_sorted(sorted(values), pct)
+
+def percentile_sorted(ordered, pct):
+    """percentile() for a list that is already sorted ascending."""
+    pos = (len(ordered) - 1) * pct / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+def summarize_rtts(rtts):
+    """
+    Reduce per-probe RTTs to the ping_server_fast() stats dict:
+    avg/min/max/jitter in ms, packet_loss in %, sent and received counts,
+    plus the p50 RTT. Jitter is the mean difference between consecutive
+    replies (RFC 3550 style). Returns None when nothing came back.
+    """
+    got = [r for r in rtts if r is not None]
+    if not got:
+        return None
+    diffs = [abs(b - a) for a, b in zip(got, got[1:])]
+    return {
+        "avg": round(sum(got) / len(got), 2),
+        "p50": round(percentile(got, 50), 2),
+        "min": round(min(got), 2),
+        "max": round(max(got), 2),
+        "packet_loss": round((len(rtts) - len(got)) / len(rtts) * 100, 1),
+        "sent": len(rtts),
+        "received": len(got),
+        "jitter": round(sum(diffs) / len(diffs), 2) if diffs else 0.0,
+    }
+
+def ping_stats(host, count=10, interval=PROBE_INTERVAL, timeout=PROBE_TIMEOUT,
+               method="auto", port=UDP_ECHO_PORT):
+    """
+    Blocking wrapper around probe_host() for worker threads.
+    Returns the stats dict from summarize_rtts(), or None on failure/total loss.
+    """
+    async def run():
+        resolved = await _resolver.resolve(host)
+        rtts = await probe_host(resolved[1][0], count, interval, timeout, method, port)
+        return _attach_dns(summarize_rtts(rtts), resolved)
+
+    try:
+        return asyncio.run(run())
+    except (OSError, ValueError) as e:
+        print(f"Latency probe to {host} failed: {e}")
+        return None
+
+
+# ---- Port (connect) probes ----
+class _FirstReplyProtocol(asyncio.DatagramProtocol):
+    """Resolves on the first datagram or ICMP error back from a connected UDP socket."""
+
+    def __init__(self, waiter):
+        self.waiter = waiter
+
+    def _done(self):
+        if not self.waiter.done():
+            self.waiter.set_result(time.perf_counter_ns())
+
+    def datagram_received(self, data, addr):
+        self._done()
+
+    def error_received(self, exc):
+        # Port unreachable still proves the round trip to the host
+        if isinstance(exc, ConnectionRefusedError):
+            self._done()
+
+
+async def _tcp_connect_once(family, sockaddr, timeout):
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        started = time.perf_counter_ns()
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, sockaddr), timeout)
+        except ConnectionRefusedError:
+            pass  # RST is a full round trip too; the host answered
+        return (time.perf_counter_ns() - started) / 1e6
+    except (asyncio.TimeoutError, OSError):
+        return None
+    finally:
+        sock.close()
+
+async def _udp_send_once(family, sockaddr, timeout):
+    loop = asyncio.get_running_loop()
+    waiter = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _FirstReplyProtocol(waiter), remote_addr=sockaddr[:2], family=family)
+    try:
+        started = time.perf_counter_ns()
+        transport.sendto(PAYLOAD_PAD)
+        received = await asyncio.wait_for(waiter, timeout)
+        return (received - started) / 1e6
+    except (asyncio.TimeoutError, OSError):
+        return None
+    finally:
+        transport.close()
+
+async def probe_port(host, port, count=10, proto="tcp", interval=PROBE_INTERVAL,
+                     timeout=PROBE_TIMEOUT):
+    """
+    Time `count` TCP handshakes (or UDP request/response round trips) to a
+    service port, for servers that drop ICMP. Probes start `interval` apart
+    and run concurrently. A TCP RST or ICMP port-unreachable counts as a
+    reply, since it still measures the path to the host.
+
+    Returns:
+        list: RTT in ms per probe, None for lost probes.
+    """
+    family, sockaddr = await _resolve(host)
+    sockaddr = (sockaddr[0], port) + tuple(sockaddr[2:])
+    once = _tcp_connect_once if proto == "tcp" else _udp_send_once
+
+    tasks = []
+    for i in range(count):
+        tasks.append(asyncio.ensure_future(once(family, sockaddr, timeout)))
+        if i + 1 < count:
+            await asyncio.sleep(interval)
+    return list(await asyncio.gather(*tasks))
+
+def parse_probe_spec(spec):
+    """
+    "443", "tcp:443" or "udp:5000" -> ("tcp"/"udp", port); "" or "icmp" -> ("icmp", None).
+    Raises ValueError on anything else.
+    """
+    spec = (spec or "").strip().lower()
+    if spec in ("", "icmp"):
+        return "icmp", None
+    proto, _, port = spec.rpartition(":")
+    proto = proto or "tcp"
+    if proto not in ("tcp", "udp"):
+        raise ValueError(f"unknown probe type '{proto}'")
+    port = int(port)
+    if not 0 < port < 65536:
+        raise ValueError(f"port out of range: {port}")
+    return proto, port
+
+
+# ---- Multi-server sweep ----
+async def probe_resolved(host, probe_ip):
+    """
+    Resolve host through the shared cache, await probe_ip(ip) -> stats and
+    add resolve_ms / dns_cached to the result (if there is one).
+    """
+    resolved = await _resolver.resolve(host)
+    return _attach_dns(await probe_ip(resolved[1][0]), resolved)
+
+async def icmp_probe(host, count=10):
+    """Native echo probe of host (resolved via the cache) -> stats dict or None."""
+    async def probe_ip(ip):
+        return summarize_rtts(await probe_host(ip, count))
+    return await probe_resolved(host, probe_ip)
+
+def make_port_probe(proto, port, count=10):
+    """Async probe(host) -> stats dict that times connects to proto/port."""
+    async def probe_ip(ip):
+        stats = summarize_rtts(await probe_port(ip, port, count, proto))
+        if stats is not None:
+            stats["method"] = f"{proto}:{port}"
+        return stats
+
+    async def probe(host):
+        return await probe_resolved(host, probe_ip)
+    return probe
+
+async def probe_target(ip, fallback=None, probe=icmp_probe, primary_probe=None):
+    """
+    Probe a server and its fallback address at the same time.
+    `primary_probe` (e.g. a port probe) replaces `probe` for the server
+    itself; the fallback always uses `probe`.
+    Returns (stats, used_fallback); the primary's result wins when it has one.
+    """
+    async def safe(fn, host):
+        try:
+            return await fn(host)
+        except (OSError, ValueError):
+            return None
+
+    primary_probe = primary_probe or probe
+    if not fallback:
+        return await safe(primary_probe, ip), False
+    primary, backup = await asyncio.gather(safe(primary_probe, ip), safe(probe, fallback))
+    if primary is not None:
+        return primary, False
+    return backup, backup is not None
+
+async def sweep_targets(targets, on_result=None, concurrency=8, probe=icmp_probe):
+    """
+    Probe every target concurrently with at most `concurrency` hosts in flight.
+
+    Args:
+        targets (dict): {key: (ip, fallback_or_None)} or
+                        {key: (ip, fallback_or_None, primary_probe)}.
+        on_result (callable): Called as on_result(key, stats, used_fallback)
+                              the moment each target finishes.
+        concurrency (int): Global in-flight probe limit (primary and fallback
+                           each count as one).
+        probe (coroutine fn): probe(host) -> stats dict or None.
+
+    Returns:
+        dict: {key: (stats, used_fallback)}
+    """
+    gate = asyncio.Semaphore(concurrency)
+
+    def limit(fn):
+        async def limited(host):
+            async with gate:
+                return await fn(host)
+        return limited
+
+    async def one(key, ip, fallback, primary_probe=None):
+        primary = limit(primary_probe) if primary_probe else None
+        return key, await probe_target(ip, fallback, limit(probe), primary)
+
+    results = {}
+    for task in asyncio.as_completed([one(k, *target) for k, target in targets.items()]):
+        key, (stats, used_fallback) = await task
+        results[key] = (stats, used_fallback)
+        if on_result:
+            on_result(key, stats, used_fallback)
+    return results
+
+def rank_results(results, max_loss=5.0):
+    """
+    Order sweep results best first: reachable servers within `max_loss` %
+    loss, then lossy ones, then unreachable; by p50 (avg when the probe
+    didn't report one) and then loss inside each group.
+    Returns [(key, stats, used_fallback)].
+    """
+    def score(item):
+        stats = item[1][0]
+        if stats is None:
+            return (2, 0.0, 0.0)
+        p50 = stats.get("p50", stats["avg"])
+        return (int(stats["packet_loss"] > max_loss), p50, stats["packet_loss"])
+    return [(key, stats, fb) for key, (stats, fb) in sorted(results.items(), key=score)]
+
+
+# ---- Continuous monitor ----
+# Sliding windows reported by LatencyMonitor.stats(), in seconds
+MONITOR_WINDOWS = (60, 300, 900)
+
+class LatencyWindow:
+    """
+    RTT samples from the last `span` seconds. Sum, loss count, jitter sum
+    and a sorted RTT list are updated on every add/expire, so stats() never
+    rescans the window.
+    """
+
+    def __init__(self, span):
+        self.span = span
+        self.samples = deque()  # (timestamp, rtt or None, |rtt - previous rtt| or None)
+        self.ordered = []
+        self.rtt_sum = 0.0
+        self.lost = 0
+        self.diff_sum = 0.0
+        self.diff_count = 0
+
+    def add(self, ts, rtt, diff):
+        self.samples.append((ts, rtt, diff))
+        if rtt is None:
+            self.lost += 1
+        else:
+            bisect.insort(self.ordered, rtt)
+            self.rtt_sum += rtt
+        if diff is not None:
+            self.diff_sum += diff
+            self.diff_count += 1
+        self.expire(ts)
+
+    def expire(self, now):
+        cutoff = now - self.span
+        while self.samples and self.samples[0][0] < cutoff:
+            _, rtt, diff = self.samples.popleft()
+            if rtt is None:
+                self.lost -= 1
+            else:
+                del self.ordered[bisect.bisect_left(self.ordered, rtt)]
+                self.rtt_sum -= rtt
+            if diff is not None:
+                self.diff_sum -= diff
+                self.diff_count -= 1
+
+    def stats(self):
+        """p50/p95/p99/avg/jitter in ms and loss in %; None values when empty."""
+        total = len(self.samples)
+        got = self.ordered
+        return {
+            "p50": round(percentile_sorted(got, 50), 2) if got else None,
+            "p95": round(percentile_sorted(got, 95), 2) if got else None,
+            "p99": round(percentile_sorted(got, 99), 2) if got else None,
+            "avg": round(self.rtt_sum / len(got), 2) if got else None,
+            "jitter": round(self.diff_sum / self.diff_count, 2) if self.diff_count else None,
+            "loss": round(self.lost / total * 100, 1) if total else None,
+            "samples": total,
+        }
+
+
+async def _single_probe(host, timeout=PROBE_TIMEOUT):
+    try:
+        return (await probe_host(host, count=1, timeout=timeout))[0]
+    except (OSError, ValueError):
+        return None
+
+class LatencyMonitor:
+    """
+    Low-rate background prober: one probe per target every `interval`
+    seconds, RTTs kept in a fixed-size ring buffer per target and rolled
+    into 1/5/15-minute LatencyWindow stats as they arrive.
+
+    Args:
+        targets (list): Hosts to watch.
+        interval (float): Seconds between probes to each target (default: 1.0).
+        windows (tuple): Window spans in seconds (default: MONITOR_WINDOWS).
+        probe (coroutine fn): probe(host) -> RTT ms or None. Defaults to a
+                              single native echo probe.
+    """
+
+    def __init__(self, targets, interval=1.0, windows=MONITOR_WINDOWS, probe=None):
+        self.interval = interval
+        self.windows = windows
+        self.probe = probe or (lambda host: _single_probe(host, min(PROBE_TIMEOUT, interval)))
+        self.ring_size = int(max(windows) / interval) + 1
+        self._lock = threading.Lock()
+        self._targets = {}
+        for host in targets:
+            self.add_target(host)
+        self._running = False
+        self._thread = None
+
+    def add_target(self, host):
+        with self._lock:
+            if host not in self._targets:
+                self._targets[host] = {
+                    "ring": deque(maxlen=self.ring_size),
+                    "windows": {span: LatencyWindow(span) for span in self.windows},
+                    "last": None,
+                }
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._main()),
+                                            name="latency-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    async def _main(self):
+        deadline = time.monotonic()
+        while self._running:
+            with self._lock:
+                hosts = list(self._targets)
+            rtts = await asyncio.gather(*(self.probe(h) for h in hosts), return_exceptions=True)
+            now = time.monotonic()
+            for host, rtt in zip(hosts, rtts):
+                self.record(host, None if isinstance(rtt, BaseException) else rtt, now)
+            # Fixed cadence: a slow probe round doesn't push later ones back
+            deadline += self.interval
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                deadline = time.monotonic()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def record(self, host, rtt, ts=None):
+        """Add one sample (None = lost) for a watched host."""
+        ts = time.monotonic() if ts is None else ts
+        with self._lock:
+            target = self._targets.get(host)
+            if target is None:
+                return
+            last = target["last"]
+            diff = abs(rtt - last) if rtt is not None and last is not None else None
+            if rtt is not None:
+                target["last"] = rtt
+            target["ring"].append((ts, rtt))
+            for window in target["windows"].values():
+                window.add(ts, rtt, diff)
+
+    def stats(self, host):
+        """
+        {"1m": {...}, "5m": {...}, "15m": {...}, "last": rtt} for a host
+        (keys follow the window spans), or None if it isn't watched.
+        """
+        now = time.monotonic()
+        with self._lock:
+            target = self._targets.get(host)
+            if target is None:
+                return None
+            result = {}
+            for span, window in target["windows"].items():
+                window.expire(now)
+                result[f"{span // 60}m" if span % 60 == 0 else f"{span}s"] = window.stats()
+            ring = target["ring"]
+            result["last"] = ring[-1][1] if ring else None
+            return result
+
+    def samples(self, host):
+        """Raw (monotonic timestamp, rtt or None) samples, oldest first."""
+        with self._lock:
+            target = self._targets.get(host)
+            return list(target["ring"]) if target else []
+
+
+class UdpEchoServer(asyncio.DatagramProtocol):
+    """Minimal RFC 862 echo responder, a local stand-in for probe checks."""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(data, addr)
+
+
+if __name__ == "__main__":
+    import sys
+
+    host = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+    print(f"ICMP datagram sockets: {'yes' if icmp_available() else 'no'}")
+
+    async def _self_check():
+        # Local UDP echo stand-in so the fallback path can run anywhere
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            UdpEchoServer, local_addr=("127.0.0.1", 0))
+        echo_port = transport.get_extra_info("sockname")[1]
+        try:
+            udp = await probe_host("127.0.0.1", count=15, method="udp", port=echo_port)
+        finally:
+            transport.close()
+        print("udp echo 127.0.0.1:", summarize_rtts(udp))
+
+    asyncio.run(_self_check())
+    started = time.perf_counter()
+    print(f"{host}:", ping_stats(host, count=15), f"({time.perf_counter() - started:.2f}s)")
@@ -0,0 +1,237 @@
+"""
+Latency History Store
+Keeps every server probe result in a local SQLite file so history survives
+the results box being cleared. Writes are queued and committed in batches
+by one background thread (WAL mode, so readers never wait on it). The
+summary queries read covering indexes only (a (server, ts) range for counts
+and loss, a (server, p50) walk for percentiles), and results older than the longest summary window are
+pruned, so neither the file nor the query cost keeps growing.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from latency_core import percentile_sorted
+
+DEFAULT_DB_FILE = "latency_history.db"
+# Commit when this many results are queued, or BATCH_LINGER seconds after
+# the first one arrived (a sweep's results land in one transaction)
+BATCH_SIZE = 64
+BATCH_LINGER = 0.05
+# Summary windows shown on the network tab: label -> seconds
+HISTORY_WINDOWS = (("1h", 3600), ("24h", 86400), ("7d", 7 * 86400))
+# Results are kept this long (the longest window), pruned every PRUNE_INTERVAL
+RETENTION_SECONDS = max(seconds for _, seconds in HISTORY_WINDOWS)
+PRUNE_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id           INTEGER PRIMARY KEY,
+    ts           REAL NOT NULL,
+    server       TEXT NOT NULL,
+    host         TEXT,
+    method       TEXT,
+    fallback     INTEGER NOT NULL DEFAULT 0,
+    avg          REAL,
+    p50          REAL,
+    min          REAL,
+    max          REAL,
+    jitter       REAL,
+    packet_loss  REAL NOT NULL,
+    sent         INTEGER,
+    received     INTEGER,
+    resolve_ms   REAL
+);
+-- Covers the window queries: range scan on (server, ts), no table lookups
+CREATE INDEX IF NOT EXISTS idx_results_server_ts
+    ON results (server, ts, p50, packet_loss);
+-- Percentiles: walks the server's RTTs in order, so no sort per query
+CREATE INDEX IF NOT EXISTS idx_results_server_p50
+    ON results (server, p50, ts);
+-- Serves the retention DELETE
+CREATE INDEX IF NOT EXISTS idx_results_ts ON results (ts);
+"""
+
+INSERT_SQL = """
+INSERT INTO results (ts, server, host, method, fallback, avg, p50, min, max,
+                     jitter, packet_loss, sent, received, resolve_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+WINDOW_SQL = """
+SELECT COUNT(*), COUNT(p50), AVG(packet_loss) FROM results
+WHERE server = ? AND ts >= ?
+"""
+
+# The two neighbouring values a percentile is interpolated between. The
+# planner would rather range-scan (server, ts) and sort the whole window
+RANK_SQL = """
+SELECT p50 FROM results INDEXED BY idx_results_server_p50
+WHERE server = ? AND ts >= ? AND p50 IS NOT NULL
+ORDER BY p50 LIMIT 2 OFFSET ?
+"""
+
+PRUNE_SQL = "DELETE FROM results WHERE ts < ?"
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL makes NORMAL durable against app crashes; only power loss can drop
+    # the last batch, which is fine for latency history
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class LatencyStore:
+    """
+    SQLite-backed history of server probe results.
+
+    Args:
+        path (str): Database file (created on first use).
+    """
+
+    def __init__(self, path=DEFAULT_DB_FILE):
+        self.path = os.path.abspath(path)
+        self.written = 0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._running = True
+        self._read_local = threading.local()
+
+        with closing(_connect(self.path)) as conn:
+            conn.executescript(SCHEMA)
+        self._thread = threading.Thread(target=self._writer_loop, name="latency-store", daemon=True)
+        self._thread.start()
+
+    # ---- Writes ----
+    def record(self, server, stats, host=None, used_fallback=False, ts=None):
+        """
+        Queue one probe result; never blocks on disk.
+
+        Args:
+            server (str): Server key from game_servers.txt.
+            stats (dict|None): Probe stats dict, None for unreachable.
+            host (str): Address that was probed.
+            used_fallback (bool): Whether the fallback host answered.
+            ts (float): Unix time of the probe (default: now).
+        """
+        stats = stats or {}
+        self._queue.put((
+            ts or time.time(), server, host, stats.get("method") or "icmp",
+            int(bool(used_fallback)), stats.get("avg"), stats.get("p50", stats.get("avg")),
+            stats.get("min"), stats.get("max"), stats.get("jitter"),
+            stats.get("packet_loss", 100.0), stats.get("sent"), stats.get("received"),
+            stats.get("resolve_ms"),
+        ))
+
+    def _writer_loop(self):
+        conn = _connect(self.path)
+        pruned_at = 0.0
+        try:
+            while self._running or not self._queue.empty():
+                try:
+                    batch = [self._queue.get(timeout=0.5)]
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + BATCH_LINGER
+                while len(batch) < BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._running:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                try:
+                    with conn:
+                        conn.executemany(INSERT_SQL, batch)
+                    self.written += len(batch)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    print(f"Latency store write failed ({len(batch)} rows dropped): {e}")
+                for _ in batch:
+                    self._queue.task_done()
+                if time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                    pruned_at = time.monotonic()
+                    self._prune(conn)
+        finally:
+            conn.close()
+
+    def _prune(self, conn):
+        """Drop results older than RETENTION_SECONDS (ts index range delete)."""
+        try:
+            with conn:
+                conn.execute(PRUNE_SQL, (time.time() - RETENTION_SECONDS,))
+        except sqlite3.Error as e:
+            print(f"Latency store prune failed: {e}")
+
+    def flush(self):
+        """Wait until everything queued so far has been committed."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Stop the writer after it has committed what's queued."""
+        self._running = False
+        self._thread.join(timeout=2.0)
+
+    # ---- Queries ----
+    def _reader(self):
+        conn = getattr(self._read_local, "conn", None)
+        if conn is None:
+            conn = self._read_local.conn = _connect(self.path)
+        return conn
+
+    def window_stats(self, server, seconds, now=None):
+        """
+        p50/p95 of the per-probe median RTT and mean loss over the last
+        `seconds`, or None if the server has no results in that window.
+        """
+        since = (now or time.time()) - seconds
+        conn = self._reader()
+        count, rtt_count, loss = conn.execute(WINDOW_SQL, (server, since)).fetchone()
+        if not count:
+            return None
+        return {
+            "p50": self._percentile(conn, server, since, rtt_count, 50),
+            "p95": self._percentile(conn, server, since, rtt_count, 95),
+            "loss": round(loss, 1),
+            "count": count,
+        }
+
+    @staticmethod
+    def _percentile(conn, server, since, n, pct):
+        """percentile_sorted() over the window's p50 values, ranked in SQL."""
+        if not n:
+            return None
+        pos = (n - 1) * pct / 100
+        lo = int(pos)
+        pair = [r[0] for r in conn.execute(RANK_SQL, (server, since, lo))]
+        return round(percentile_sorted(pair, (pos - lo) * 100), 2)
+
+    def history(self, server, windows=HISTORY_WINDOWS):
+        """{label: window_stats} for each (label, seconds) window."""
+        now = time.time()
+        return {label: self.window_stats(server, seconds, now) for label, seconds in windows}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_latency_store(path=DEFAULT_DB_FILE):
+    """Shared LatencyStore, opened on first use (None if the file can't be opened)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = LatencyStore(path)
+                except sqlite3.Error as e:
+                    print(f"Latency history disabled: {e}")
+                    return None
+    return _store
@@ -91,7 +91,7 @@ def build_metrics(root, style):
             f_cpu = tb.Frame(nb)
             nb.add(f_cpu, text="Processing Stats")
             f_cpu.columnconfigure(0, weight=1)
-            f_cpu.rowconfigure(1, weight=1)  # Let process list expand
+            f_cpu.rowconfigure(2, weight=1)  # Let process list expand
 
             cpu_labels = {}
 
@@ -106,6 +106,11 @@ def build_metrics(root, style):
             cpu_info_lbl.grid(row=0, column=0, sticky="ew", padx=4, pady=2)
             cpu_labels["Info"] = cpu_info_lbl
 
+            # Per-core load bars
+            cpu_core_canvas = tb.Canvas(f_cpu, height=40, background="black", highlightthickness=0)
+            cpu_core_canvas.grid(row=1, column=0, sticky="ew", padx=4, pady=2)
+            cpu_labels["Core Bars"] = cpu_core_canvas
+
             # TOP PROCESSES - Changed from Label to Text widget for colorization
             cpu_top_text = tk.Text(
                 f_cpu,
@@ -121,7 +126,7 @@ def build_metrics(root, style):
                 borderwidth=0,
                 highlightthickness=0
             )
-            cpu_top_text.grid(row=1, column=0, sticky="nsew", padx=4, pady=4)
+            cpu_top_text.grid(row=2, column=0, sticky="nsew", padx=4, pady=4)
             cpu_labels["Top Processes"] = cpu_top_text
             
 
@@ -186,6 +191,16 @@ def build_metrics(root, style):
             )
             latency_lbl.pack(side="left")
 
+            # Kernel TCP/UDP health rates (retransmits, out-of-order, drops)
+            tcp_health_lbl = tb.Label(
+                latency_frame,
+                text="TCP: ...",
+                anchor="e",
+                font=FONT_NETTXT,
+                foreground=CRT_GREEN
+            )
+            tcp_health_lbl.pack(side="right")
+
             # --- Separator ---
             separator1 = tb.Separator(f_net, orient="horizontal")
             separator1.grid(row=2, column=0, sticky="ew", padx=4, pady=6)
@@ -265,7 +280,26 @@ def build_metrics(root, style):
             results_scrollbar.grid(row=0, column=1, sticky="ns")
             results_text.config(yscrollcommand=results_scrollbar.set)
 
+            # Per-interface throughput table (all NICs, not just the primary)
+            nic_table = tb.Treeview(
+                f_net,
+                columns=("rx", "tx", "err", "drop"),
+                height=4,
+                bootstyle="success"
+            )
+            nic_table.heading("#0", text="IFACE", anchor="w")
+            nic_table.heading("rx", text="RX MB/s", anchor="e")
+            nic_table.heading("tx", text="TX MB/s", anchor="e")
+            nic_table.heading("err", text="ERR/s", anchor="e")
+            nic_table.heading("drop", text="DROP/s", anchor="e")
+            nic_table.column("#0", width=110, stretch=True, anchor="w")
+            for col in ("rx", "tx", "err", "drop"):
+                nic_table.column(col, width=70, stretch=False, anchor="e")
+            nic_table.grid(row=6, column=0, sticky="ew", padx=4, pady=(2, 4))
+
             # --- Store references in info_labels for easy updates ---
+            info_labels["NicTable"] = nic_table
+            info_labels["TcpHealth"] = tcp_health_lbl
             info_labels["NetFrame"] = net_frame
             info_labels["NetPrefix"] = net_prefix_lbl
             info_labels["Net IN"] = net_in_lbl
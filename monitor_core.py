@@ -2,11 +2,19 @@ import psutil
 import subprocess
 import platform
 import time
-import shutil
 import re
 import os
 import sys
+import glob
+import threading
 from datetime import datetime
+from typing import Any, NamedTuple, Optional
+import collector_core
+import gpu_core
+import latency_core
+import net_core
+import tcp_core
+import process_core
 # Try to import win32pdh, but don't fail if not available
 try:
     import win32pdh
@@ -14,6 +22,13 @@ try:
 except ImportError:
     WIN32_AVAILABLE = False
 
+# NumPy is optional; per-core CPU math falls back to plain lists without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # ---- CPU Info (cached) ----
 _cpu_model_cache = None
 
@@ -24,10 +39,6 @@ _freq_min = None
 _freq_max = None
 _freq_base = None
 
-# ---- Disk I/O (rate based on actual elapsed) ----
-_last_disk_io = psutil.disk_io_counters()
-_last_disk_ts = time.time()
-
 # ---- Optional Windows WMI (for CPU model & temperature) ----
 WMI_AVAILABLE = False
 if platform.system() == "Windows":
@@ -38,10 +49,6 @@ if platform.system() == "Windows":
         WMI_AVAILABLE = False
 
 # ---- Helpers ----
-def _which(cmd: str) -> bool:
-    """Check if a command is available in the system's PATH."""
-    return shutil.which(cmd) is not None
-
 def _run_cmd(args, timeout=0.3):
     """Run a subprocess command and return its output."""
     try:
@@ -292,12 +299,334 @@ def get_cpu_info():
         "logical_cores": psutil.cpu_count(logical=True) or 0,
     }
 
+# ---- Per-core CPU utilization ----
+# Column order of the counter matrix (jiffies, as in /proc/stat)
+CPU_COUNTER_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+def read_cpu_counters(stat_path="/proc/stat"):
+    """
+    Read cumulative per-core CPU counters in one pass.
+    Returns an (n_cores x 8) matrix in CPU_COUNTER_FIELDS order (a NumPy array
+    when NumPy is installed, else a list of lists), or None if unavailable.
+    Uses /proc/stat where it exists, psutil.cpu_times(percpu=True) elsewhere.
+    """
+    rows = None
+    try:
+        with open(stat_path, "rb") as f:
+            data = f.read()
+        rows = []
+        for line in data.splitlines():
+            if line.startswith(b"cpu") and line[3:4].isdigit():
+                fields = line.split()[1:9]
+                rows.append(fields + [b"0"] * (8 - len(fields)))
+            elif rows:
+                break  # per-core lines are contiguous
+    except OSError:
+        rows = None
+
+    if not rows:
+        try:
+            rows = [[getattr(t, "user", 0), getattr(t, "nice", 0), getattr(t, "system", 0),
+                     getattr(t, "idle", 0), getattr(t, "iowait", 0),
+                     getattr(t, "irq", getattr(t, "interrupt", 0)),
+                     getattr(t, "softirq", getattr(t, "dpc", 0)), getattr(t, "steal", 0)]
+                    for t in psutil.cpu_times(percpu=True)]
+        except Exception:
+            return None
+        if not rows:
+            return None
+        if NUMPY_AVAILABLE:
+            return np.array(rows, dtype=np.float64)
+        return rows
+
+    if NUMPY_AVAILABLE:
+        return np.array(rows, dtype=np.int64)
+    return [[int(v) for v in row] for row in rows]
+
+def cpu_core_breakdown(prev, cur):
+    """
+    Per-core utilization between two read_cpu_counters() results.
+    Returns {"user", "system", "iowait", "idle", "busy": [% per core],
+    "total": aggregate busy %} or None if the core set changed.
+    """
+    if prev is None or cur is None or len(prev) != len(cur):
+        return None
+
+    if NUMPY_AVAILABLE:
+        d = np.clip(np.asarray(cur) - np.asarray(prev), 0, None).astype(np.float64)
+        total = d.sum(axis=1)
+        idle_rows = total == 0
+        d[idle_rows, 3] = 1.0  # no ticks elapsed: report the core as idle
+        total[idle_rows] = 1.0
+        pct = d / total[:, None] * 100.0
+        user = pct[:, 0] + pct[:, 1]
+        system = pct[:, 2] + pct[:, 5] + pct[:, 6]
+        busy = 100.0 - pct[:, 3] - pct[:, 4]
+        agg = d.sum(axis=0)
+        total_busy = 100.0 - (agg[3] + agg[4]) / max(agg.sum(), 1.0) * 100.0
+        return {
+            "user": np.round(user, 1).tolist(),
+            "system": np.round(system, 1).tolist(),
+            "iowait": np.round(pct[:, 4], 1).tolist(),
+            "idle": np.round(pct[:, 3], 1).tolist(),
+            "busy": np.round(busy, 1).tolist(),
+            "total": round(float(total_busy), 1),
+        }
+
+    out = {"user": [], "system": [], "iowait": [], "idle": [], "busy": []}
+    agg = [0.0] * 8
+    for p_row, c_row in zip(prev, cur):
+        d = [max(0, c - p) for p, c in zip(p_row, c_row)]
+        for i, v in enumerate(d):
+            agg[i] += v
+        total = sum(d)
+        if total == 0:
+            d, total = [0, 0, 0, 1, 0, 0, 0, 0], 1
+        out["user"].append(round((d[0] + d[1]) / total * 100, 1))
+        out["system"].append(round((d[2] + d[5] + d[6]) / total * 100, 1))
+        out["iowait"].append(round(d[4] / total * 100, 1))
+        out["idle"].append(round(d[3] / total * 100, 1))
+        out["busy"].append(round(100 - (d[3] + d[4]) / total * 100, 1))
+    out["total"] = round(100 - (agg[3] + agg[4]) / max(sum(agg), 1) * 100, 1)
+    return out
+
+
+class PerCoreCpuEngine:
+    """
+    Keeps its own counter baseline and a fixed-length busy % history per core.
+    Feed it the counters already read for a Snapshot to avoid a second
+    /proc/stat read, or let update() read them itself.
+
+    Args:
+        history_len (int): Points kept per core (default: 60).
+        stat_path (str): /proc/stat location, for fixture files.
+    """
+
+    def __init__(self, history_len=60, stat_path="/proc/stat"):
+        self.history_len = history_len
+        self.stat_path = stat_path
+        self._last = None
+        self._hist = None
+        self._pos = 0
+        self._filled = 0
+
+    def update(self, counters=None):
+        """Advance one tick; returns the cpu_core_breakdown() dict or None."""
+        if counters is None:
+            counters = read_cpu_counters(self.stat_path)
+        breakdown = cpu_core_breakdown(self._last, counters)
+        self._last = counters
+        if breakdown is None:
+            return None
+
+        busy = breakdown["busy"]
+        if self._hist is None or len(self._hist) != len(busy):
+            # First tick or CPU hotplug: start a fresh history matrix
+            if NUMPY_AVAILABLE:
+                self._hist = np.zeros((len(busy), self.history_len), dtype=np.float32)
+            else:
+                self._hist = [[0.0] * self.history_len for _ in busy]
+            self._pos = self._filled = 0
+        if NUMPY_AVAILABLE:
+            self._hist[:, self._pos] = busy
+        else:
+            for row, value in zip(self._hist, busy):
+                row[self._pos] = value
+        self._pos = (self._pos + 1) % self.history_len
+        self._filled = min(self._filled + 1, self.history_len)
+        return breakdown
+
+    def history(self, core):
+        """Busy % history of one core, oldest first."""
+        if self._hist is None or not 0 <= core < len(self._hist):
+            return []
+        row = list(self._hist[core])
+        ordered = row[self._pos:] + row[:self._pos]
+        return [round(float(v), 1) for v in ordered[self.history_len - self._filled:]]
+
+    def histories(self):
+        """Busy % history of every core, oldest first."""
+        return [self.history(i) for i in range(len(self._hist) if self._hist is not None else 0)]
+
+
+# Keyword tiers used to pick the CPU sensor, matched against the sensor device name
+CPU_TEMP_TIERS = (('cpu', 'core', 'package'), ('temp', 'thermal'))
+
+class CpuTempSensor:
+    """
+    Resolves the CPU temperature sensor once and then re-reads only that file.
+
+    Discovery walks hwmon (falling back to thermal zones) the same way
+    psutil.sensors_temperatures() does and applies CPU_TEMP_TIERS to pick the
+    exact temp*_input file. Reads are a single pread() on a cached fd;
+    discovery runs again only when a read fails.
+
+    Args:
+        sysfs_root (str): sysfs mount point (default: "/sys").
+        retry_sec (float): How long to wait before re-running discovery after
+                           it found nothing (default: 60).
+    """
+    CORE_LABEL = re.compile(r'(?:core|tccd)\s*(\d+)', re.IGNORECASE)
+
+    def __init__(self, sysfs_root="/sys", retry_sec=60.0):
+        self.sysfs_root = sysfs_root
+        self.retry_sec = retry_sec
+        self.device = None
+        self.path = None
+        self.core_paths = []
+        self._fd = None
+        self._core_fds = []
+        self._last_discovery = None
+        self._lock = threading.Lock()
+
+    @property
+    def has_sysfs(self):
+        """True when this machine exposes hwmon / thermal zones (Linux)."""
+        return (os.path.isdir(os.path.join(self.sysfs_root, "class", "hwmon")) or
+                os.path.isdir(os.path.join(self.sysfs_root, "class", "thermal")))
+
+    def _candidates(self):
+        """Return [(device_name, label, input_path)] in psutil's order."""
+        hwmon = os.path.join(self.sysfs_root, "class", "hwmon")
+        bases = set()
+        for pattern in ("hwmon*/temp*_input", "hwmon*/device/temp*_input"):
+            for path in glob.glob(os.path.join(hwmon, pattern)):
+                bases.add(path[:-len("_input")])
+        found = []
+        for base in sorted(bases):
+            try:
+                with open(os.path.join(os.path.dirname(base), "name")) as f:
+                    name = f.read().strip()
+            except OSError:
+                continue
+            try:
+                with open(base + "_label") as f:
+                    label = f.read().strip()
+            except OSError:
+                label = ""
+            found.append((name, label, base + "_input"))
+        if bases:
+            return found
+
+        # No hwmon temperatures at all: thermal zones
+        for zone in sorted(glob.glob(os.path.join(self.sysfs_root, "class", "thermal", "thermal_zone*"))):
+            try:
+                with open(os.path.join(zone, "type")) as f:
+                    name = f.read().strip()
+            except OSError:
+                continue
+            found.append((name, "", os.path.join(zone, "temp")))
+        return found
+
+    def _close(self):
+        for fd in [self._fd] + self._core_fds:
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd = None
+        self._core_fds = []
+
+    def discover(self):
+        """Pick the CPU sensor (and the per-core sensors of the same device)."""
+        self._close()
+        self.device = self.path = None
+        self.core_paths = []
+        self._last_discovery = time.monotonic()
+
+        candidates = [c for c in self._candidates() if _read_millideg(c[2]) is not None]
+        for keywords in CPU_TEMP_TIERS:
+            for name, label, path in candidates:
+                if any(kw in name.lower() for kw in keywords):
+                    self.device, self.path = name, path
+                    break
+            if self.path:
+                break
+        if not self.path:
+            return False
+
+        self._fd = os.open(self.path, os.O_RDONLY)
+        cores = []
+        for name, label, path in candidates:
+            match = self.CORE_LABEL.match(label)
+            if name == self.device and match:
+                cores.append((int(match.group(1)), path))
+        self.core_paths = [path for _, path in sorted(cores)]
+        for path in self.core_paths:
+            try:
+                self._core_fds.append(os.open(path, os.O_RDONLY))
+            except OSError:
+                self._core_fds.append(None)
+        return True
+
+    def _ensure_resolved(self):
+        if self._fd is not None:
+            return True
+        if self._last_discovery is not None and time.monotonic() - self._last_discovery < self.retry_sec:
+            return False
+        try:
+            return self.discover()
+        except OSError:
+            return False
+
+    def read(self):
+        """Return the CPU temperature in Celsius, or None."""
+        with self._lock:
+            for _ in range(2):
+                if not self._ensure_resolved():
+                    return None
+                value = _pread_millideg(self._fd)
+                if value is not None:
+                    return value
+                # Sensor vanished (driver reload, hwmon renumbering): rediscover
+                self._close()
+                self._last_discovery = None
+            return None
+
+    def read_cores(self):
+        """Return per-core temperatures (ordered by core number) as a list."""
+        with self._lock:
+            if not self._ensure_resolved():
+                return []
+            return [_pread_millideg(fd) if fd is not None else None for fd in self._core_fds]
+
+
+def _read_millideg(path):
+    try:
+        with open(path, "rb") as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+def _pread_millideg(fd):
+    try:
+        return int(os.pread(fd, 32, 0).strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+_cpu_temp_sensor = CpuTempSensor()
+_cpu_temp_breaker = collector_core.get_breaker("cpu_temp_fallback")
+
+def get_cpu_core_temps():
+    """Returns a list of per-core CPU temperatures in Celsius (empty if unavailable)."""
+    if _cpu_temp_sensor.has_sysfs:
+        return _cpu_temp_sensor.read_cores()
+    return []
+
 def get_cpu_temp():
     """
     Returns CPU temperature in Celsius, or None if not available.
-    Supports `psutil.sensors_temperatures()` as the primary method for all platforms,
-    with a robust search for common sensor names.
+    On Linux the sensor is resolved once (see CpuTempSensor). Elsewhere
+    `psutil.sensors_temperatures()` is searched for common sensor names.
     """
+    if _cpu_temp_sensor.has_sysfs:
+        return _cpu_temp_sensor.read()
+    # Sensorless machines would otherwise pay for the search (and WMI) every sample
+    return _cpu_temp_breaker.call(_get_cpu_temp_fallback)
+
+def _get_cpu_temp_fallback():
+    """psutil sensor search plus the Windows WMI fallback."""
     try:
         temps = psutil.sensors_temperatures()
         if not temps:
@@ -347,36 +676,12 @@ def get_load_average():
         return f"{cpu:.1f}"
     
 def get_top_processes(limit=5):
-    """Return top processes sorted by CPU usage (safe across platforms)."""
-    processes = []
-    for p in psutil.process_iter(['pid', 'username', 'nice', 'memory_info', 'cpu_percent', 'name']):
-        try:
-            info = p.info
-            virt = (info.get('memory_info').vms if info.get('memory_info') else 0) / (1024 * 1024)
-            res = (info.get('memory_info').rss if info.get('memory_info') else 0) / (1024 * 1024)
-            processes.append((
-                info.get('pid', 0),
-                (info.get('username') or "unknown")[:8],
-                info.get('nice', 0),
-                virt,
-                res,
-                info.get('cpu_percent', 0.0),
-                p.memory_percent() if p else 0.0,
-                info.get('name', "unknown")
-            ))
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            continue
-
-    # Sort by CPU%
-    processes.sort(key=lambda x: x[5], reverse=True)
-
-    top = []
-    for proc in processes[:limit]:
-        pid, user, nice, virt, res, cpu, mem, name = proc
-        top.append(
-            f"{pid:<6} {user:<8} {virt:>6.1f}M {res:>6.1f}M {cpu:>5.1f} {mem:>5.1f}  {name}"
-        )
-    return top
+    """
+    Return the top processes by CPU usage as formatted lines.
+    Backed by a persistent process table (see process_core.ProcessTable).
+    """
+    table = process_core.get_process_table()
+    return [process_core.format_process_row(row) for row in table.top(limit)]
 
 # ---- RAM ----
 def get_ram_usage():
@@ -396,27 +701,201 @@ def get_ram_info():
         return {"used": 0.0, "available": 0.0}
 
 
+# ---- Disk I/O (per-device rate engine) ----
+# /proc/diskstats sectors are always 512 bytes, whatever the device reports
+DISKSTATS_SECTOR = 512
+# Whole-disk names that are never real storage
+DISK_SKIP_PREFIXES = ("loop", "ram", "zram", "fd", "sr")
+
+class DiskCounters(NamedTuple):
+    """Cumulative counters for one block device."""
+    read_ios: int
+    read_bytes: int
+    read_ms: int
+    write_ios: int
+    write_bytes: int
+    write_ms: int
+    busy_ms: int
+
+# DiskCounters fields the kernel keeps in unsigned int (the *_ms times and
+# io_ticks) and so can wrap at 2**32; sectors and I/O counts are 64-bit
+DISK_WRAPPING_FIELDS = tuple(name.endswith("_ms") for name in DiskCounters._fields)
+
+def _counter_delta(prev, cur, wraps=False):
+    """
+    Difference of two monotonic counters.
+    For a 32-bit counter (wraps=True) a drop below 2**32 is read as a wrap;
+    any other drop means the device was re-added, so the current value is
+    the delta.
+    """
+    if cur >= prev:
+        return cur - prev
+    if wraps and prev < 2**32:
+        return cur + 2**32 - prev
+    return cur
+
+def read_disk_counters(procfs_root="/proc", sysfs_root="/sys"):
+    """
+    Read cumulative counters for every whole disk.
+    Returns {device: DiskCounters}. Uses /proc/diskstats on Linux and
+    psutil.disk_io_counters(perdisk=True) elsewhere. Partitions, loop and
+    ram devices are skipped so nothing is counted twice.
+    """
+    devices = {}
+    try:
+        with open(os.path.join(procfs_root, "diskstats"), "rb") as f:
+            data = f.read()
+        block = os.path.join(sysfs_root, "block")
+        whole = set(os.listdir(block)) if os.path.isdir(block) else None
+        for line in data.splitlines():
+            parts = line.split()
+            if len(parts) < 14:
+                continue
+            name = parts[2].decode(errors="replace")
+            if name.startswith(DISK_SKIP_PREFIXES):
+                continue
+            if whole is not None and name not in whole:
+                continue  # partition
+            devices[name] = DiskCounters(
+                int(parts[3]), int(parts[5]) * DISKSTATS_SECTOR, int(parts[6]),
+                int(parts[7]), int(parts[9]) * DISKSTATS_SECTOR, int(parts[10]),
+                int(parts[12]),
+            )
+        return devices
+    except (OSError, ValueError):
+        pass
+
+    try:
+        for name, io in psutil.disk_io_counters(perdisk=True, nowrap=True).items():
+            devices[name] = DiskCounters(
+                io.read_count, io.read_bytes, getattr(io, "read_time", 0),
+                io.write_count, io.write_bytes, getattr(io, "write_time", 0),
+                getattr(io, "busy_time", 0),
+            )
+    except Exception:
+        pass
+    return devices
+
+# (sysfs_root, device names) -> stacked set; sysfs is only re-listed when
+# the set of devices changes
+_stacked_cache = {}
+
+def _stacked_disks(names, sysfs_root="/sys"):
+    """Devices built on top of other devices (dm, md); excluded from totals."""
+    key = (sysfs_root, frozenset(names))
+    cached = _stacked_cache.get(key)
+    if cached is not None:
+        return cached
+    stacked = set()
+    for name in names:
+        try:
+            if os.listdir(os.path.join(sysfs_root, "block", name, "slaves")):
+                stacked.add(name)
+        except OSError:
+            pass
+    stacked = frozenset(stacked)
+    _stacked_cache.clear()  # only the current device set is worth keeping
+    _stacked_cache[key] = stacked
+    return stacked
+
+def disk_rates_between(prev, cur, elapsed, stacked=()):
+    """
+    Per-device rates between two read_disk_counters() results.
+
+    Returns a dict with "devices" ({device: {"read_mb", "write_mb",
+    "read_iops", "write_iops", "await_ms", "busy_pct"}}) and the aggregate
+    read_mb / write_mb / read_iops / write_iops / await_ms, plus busy_pct of
+    the busiest device. Stacked devices are reported but left out of totals.
+    """
+    elapsed = max(1e-3, elapsed)
+    mb = 1024 * 1024
+    devices = {}
+    tot = [0, 0, 0, 0, 0]  # read_bytes, write_bytes, read_ios, write_ios, io_ms
+    busiest = 0.0
+    for name, c in cur.items():
+        p = prev.get(name)
+        if p is None:
+            continue  # new device, no baseline yet
+        # A drop in any 64-bit counter means the device was re-added: every
+        # field restarted, so none of the ms drops are wraps either
+        reset = any(b < a for a, b, w in zip(p, c, DISK_WRAPPING_FIELDS) if not w)
+        d = [_counter_delta(a, b, w and not reset) for a, b, w in zip(p, c, DISK_WRAPPING_FIELDS)]
+        ios = d[0] + d[3]
+        io_ms = d[2] + d[5]
+        busy = min(100.0, d[6] / (elapsed * 1000) * 100)
+        devices[name] = {
+            "read_mb": d[1] / mb / elapsed,
+            "write_mb": d[4] / mb / elapsed,
+            "read_iops": d[0] / elapsed,
+            "write_iops": d[3] / elapsed,
+            "await_ms": io_ms / ios if ios else 0.0,
+            "busy_pct": busy,
+        }
+        if name in stacked:
+            continue
+        tot[0] += d[1]
+        tot[1] += d[4]
+        tot[2] += d[0]
+        tot[3] += d[3]
+        tot[4] += io_ms
+        busiest = max(busiest, busy)
+
+    ios = tot[2] + tot[3]
+    return {
+        "devices": devices,
+        "read_mb": tot[0] / mb / elapsed,
+        "write_mb": tot[1] / mb / elapsed,
+        "read_iops": tot[2] / elapsed,
+        "write_iops": tot[3] / elapsed,
+        "await_ms": tot[4] / ios if ios else 0.0,
+        "busy_pct": busiest,
+    }
+
+
+class DiskRateTracker:
+    """
+    Independent disk rate baseline. Each consumer creates its own tracker so
+    one caller sampling never resets another caller's interval.
+
+    Args:
+        procfs_root (str): /proc location, for fixture trees.
+        sysfs_root (str): /sys location, for fixture trees.
+    """
+
+    def __init__(self, procfs_root="/proc", sysfs_root="/sys"):
+        self.procfs_root = procfs_root
+        self.sysfs_root = sysfs_root
+        self._last = read_disk_counters(procfs_root, sysfs_root)
+        self._last_ts = time.monotonic()
+        self._stacked = _stacked_disks(self._last, sysfs_root)
+
+    def sample(self):
+        """Rates since the previous sample (or since creation)."""
+        now = time.monotonic()
+        cur = read_disk_counters(self.procfs_root, self.sysfs_root)
+        if set(cur) != set(self._last):
+            self._stacked = _stacked_disks(cur, self.sysfs_root)
+        rates = disk_rates_between(self._last, cur, now - self._last_ts, self._stacked)
+        self._last, self._last_ts = cur, now
+        return rates
+
+
+# Baseline for the legacy get_disk_io() helper only
+_disk_tracker = None
+
 def get_disk_io(interval=None):
     """
     Returns (read_MB_per_s, write_MB_per_s).
     Uses actual elapsed time since the previous call for accuracy.
     The 'interval' parameter is accepted for API compatibility but is not used to sleep.
+    Callers that need their own baseline should hold a DiskRateTracker instead.
     """
-    global _last_disk_io, _last_disk_ts
+    global _disk_tracker
     try:
-        now = time.time()
-        io_now = psutil.disk_io_counters()
-        elapsed = max(1e-3, now - _last_disk_ts)  # avoid div by zero
-
-        read_bytes = io_now.read_bytes - _last_disk_io.read_bytes
-        write_bytes = io_now.write_bytes - _last_disk_io.write_bytes
-
-        _last_disk_io = io_now
-        _last_disk_ts = now
-
-        read_mb_s = read_bytes / (1024 * 1024) / elapsed
-        write_mb_s = write_bytes / (1024 * 1024) / elapsed
-        return read_mb_s, write_mb_s
+        if _disk_tracker is None:
+            _disk_tracker = DiskRateTracker()
+        rates = _disk_tracker.sample()
+        return rates["read_mb"], rates["write_mb"]
     except Exception:
         return 0.0, 0.0
 
@@ -451,106 +930,68 @@ def get_disk_summary(max_drives=3):
     return " | ".join(summary)
 
 # ---- GPU ----
-def _nvidia_smi_available():
-    return _which("nvidia-smi")
-    
-def _rocm_smi_available():
-    return _which("rocm-smi")
-
 def get_gpu_usage():
     """
     Returns GPU utilization percent (float) or None if not available.
-    Supports NVIDIA (via nvidia-smi) and AMD (via rocm-smi on Linux).
+    Supports NVIDIA (via NVML or nvidia-smi) and AMD (via rocm-smi on Linux).
     """
-    try:
-        if _nvidia_smi_available():
-            out = _run_cmd(["nvidia-smi", "--query-gpu=utilization.gpu", "--format=csv,noheader,nounits"], timeout=0.25)
-            if out:
-                return float(out.splitlines()[0].strip())
-        elif platform.system() == "Linux" and _rocm_smi_available():
-            out = _run_cmd(["rocm-smi", "--showuse", "--json"], timeout=0.25)
-            if out:
-                import json
-                data = json.loads(out)
-                # Parse the usage data from the JSON output
-                gpus = data.get("GPUs", [])
-                if gpus and gpus[0].get("GPU use (%)"):
-                    return float(gpus[0]["GPU use (%)"].strip('% '))
-
-    except Exception:
-        return None
-    return None
+    stats = get_gpu_stats()
+    return stats["usage"] if stats else None
 
 def get_gpu_clock_speed():
     """
-    Returns the live GPU clock speed from nvidia-smi as a string.
-    Returns "N/A" if nvidia-smi is not available or an error occurs.
+    Returns the live GPU SM clock speed in MHz as a string.
+    Returns "N/A" if no GPU provider is available or an error occurs.
     """
-    nvidia_smi_path = "nvidia-smi"
-    if os.name == 'nt' and not os.path.exists(os.path.join(os.environ.get('ProgramFiles', ''), 'NVIDIA Corporation', 'NVSMI', 'nvidia-smi.exe')):
-        pass
-    else:
-        try:
-            subprocess.run([nvidia_smi_path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        except (FileNotFoundError, subprocess.CalledProcessError):
-            return "N/A"
-
-    try:
-        output = subprocess.check_output([nvidia_smi_path, "--query-gpu=clocks.sm", "--format=csv,noheader,nounits"], universal_newlines=True)
-        clock_speed_mhz = float(output.strip()) 
-        return f"{clock_speed_mhz:>.0f}"
-    except (subprocess.CalledProcessError, FileNotFoundError, IndexError, ValueError) as e:
+    stats = get_gpu_stats()
+    if not stats or stats["clock"] is None:
         return "N/A"
+    return f"{stats['clock']:>.0f}"
 
 
 def get_gpu_temp():
     """
     Returns GPU temperature in Celsius, or None if not available.
-    Supports NVIDIA (via nvidia-smi) and AMD (via rocm-smi on Linux).
+    Supports NVIDIA (via NVML or nvidia-smi) and AMD (via rocm-smi on Linux).
     """
-    try:
-        if _nvidia_smi_available():
-            out = _run_cmd(["nvidia-smi", "--query-gpu=temperature.gpu", "--format=csv,noheader,nounits"], timeout=0.25)
-            if out:
-                return float(out.splitlines()[0].strip())
-        elif platform.system() == "Linux" and _rocm_smi_available():
-            out = _run_cmd(["rocm-smi", "--showtemp", "--json"], timeout=0.25)
-            if out:
-                import json
-                data = json.loads(out)
-                gpus = data.get("GPUs", [])
-                if gpus and gpus[0].get("Temperature (Sensor)"):
-                    temp_data = gpus[0]["Temperature (Sensor)"]
-                    if isinstance(temp_data, dict) and "temp (C)" in temp_data:
-                        return float(temp_data["temp (C)"])
-                    return float(temp_data.strip(' C'))
-
-    except Exception:
-        return None
-    return None
+    stats = get_gpu_stats()
+    return stats["temp"] if stats else None
 
 def get_gpu_info():
-    if _nvidia_smi_available():
-        out = _run_cmd(["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"], timeout=0.25)
-        return out if out else "NVIDIA GPU"
-    elif platform.system() == "Linux" and _rocm_smi_available():
-        out = _run_cmd(["rocm-smi", "--showproductname"], timeout=0.25)
-        return out.splitlines()[-1] if out else "AMD GPU"
+    # The gpu_info collector's half-open trial re-runs provider selection, so a
+    # driver or *-smi tool installed since the last check is found
+    if collector_core.get_breaker("gpu_info").state == "half_open":
+        gpu_core.recheck_gpu_provider()
+    provider = gpu_core.get_gpu_provider()
+    if provider is not None:
+        return provider.get_name()
     elif platform.system() == "Windows" and WMI_AVAILABLE:
-        try:
-            w = wmi.WMI()
-            gpus = w.Win32_VideoController()
-            if gpus:
-                for gpu in gpus:
-                    if "NVIDIA" in gpu.name:
-                        return gpu.name
-                    if "AMD" in gpu.name:
-                        return gpu.name
-                return gpus[0].name
-        except Exception:
-            pass
+        return collector_core.get_breaker("gpu_wmi").call(_get_gpu_name_wmi)
+    return None
+
+def _get_gpu_name_wmi():
+    w = wmi.WMI()
+    gpus = w.Win32_VideoController()
+    if gpus:
+        for gpu in gpus:
+            if "NVIDIA" in gpu.name:
+                return gpu.name
+            if "AMD" in gpu.name:
+                return gpu.name
+        return gpus[0].name
     return None
 
+def get_gpu_stats():
+    """
+    Returns a dict {"usage": %, "temp": °C, "clock": MHz, "mem_used_mb", "mem_total_mb"}
+    from one provider read, or None if no GPU provider is available.
+    Individual values are None when the device doesn't report them.
+    """
+    provider = gpu_core.get_gpu_provider()
+    if provider is None:
+        return None
+    return provider.read()
+
 
 # ---- Time & Uptime ----
 def get_local_date():
@@ -587,6 +1028,11 @@ def ping_host(host_address, ping_count=3, timeout=10):
     Returns:
         float: The average latency in milliseconds, or None if ping fails.
     """
+    # Native ICMP probes when permitted: no fork, no locale-dependent parsing
+    if latency_core.icmp_available():
+        stats = latency_core.ping_stats(host_address, count=ping_count, timeout=min(timeout, 2))
+        return stats["avg"] if stats else None
+
     try:
         # Build cross-platform command
         if os.name == 'nt':  # Windows
@@ -649,85 +1095,144 @@ def get_primary_interface():
     """
     Auto-select the main active interface, ignoring loopback and virtual interfaces.
     Returns tuple (interface_name, connection_type) or (None, None).
-    connection_type will be "WiFi", "Ethernet", or "Unknown".
+    connection_type will be "WiFi", "Ethernet", "Virtual" or "Unknown".
+    Served from the event-driven net_core registry, so calling it is cheap.
     """
-    import platform
-    
-    try:
-        stats = psutil.net_io_counters(pernic=True)
-        addrs = psutil.net_if_addrs()
-        if_stats = psutil.net_if_stats()
-        
-        system = platform.system()
-        candidates = []
-        
-        for iface in stats.keys():
-            if iface not in addrs or iface not in if_stats:
-                continue
-            
-            low = iface.lower()
-            
-            # Skip loopback and virtual interfaces
-            if low in ("lo", "loopback") or any(x in low for x in ["docker", "veth", "virtual", "vmnet", "vbox"]):
-                continue
-            
-            # Check if interface is up and has an IP address
-            is_up = if_stats[iface].isup
-            has_ip = any(addr.family == 2 for addr in addrs[iface])  # AF_INET
-            
-            if not (is_up and has_ip):
-                continue
-            
-            # Determine connection type
-            conn_type = "Unknown"
-            
-            if system == "Windows":
-                if "wi-fi" in low or "wireless" in low or "wlan" in low:
-                    conn_type = "WiFi"
-                elif "ethernet" in low or "local area" in low or "lan" in low:
-                    conn_type = "Ethernet"
-            elif system == "Linux":
-                if "wlan" in low or "wifi" in low or "wlp" in low:
-                    conn_type = "WiFi"
-                elif "eth" in low or "enp" in low or "eno" in low or "ens" in low:
-                    conn_type = "Ethernet"
-            elif system == "Darwin":  # macOS
-                if "en" in low:
-                    conn_type = "Unknown"
-            
-            total_bytes = stats[iface].bytes_sent + stats[iface].bytes_recv
-            candidates.append((iface, conn_type, total_bytes))
-        
-        if not candidates:
-            return None, None
-        
-        # Sort by total bytes (most active first)
-        candidates.sort(key=lambda x: x[2], reverse=True)
-        
-        # Prefer WiFi or Ethernet over Unknown
-        for iface, conn_type, _ in candidates:
-            if conn_type in ("WiFi", "Ethernet"):
-                return iface, conn_type
-        
-        # Return most active interface even if type is unknown
-        return candidates[0][0], candidates[0][1]
-        
-    except Exception as e:
-        print(f"Error detecting primary interface: {e}")
-        return None, None
+    return net_core.get_interface_registry().get_primary()
+
+
+class NetRateTracker:
+    """
+    Sleep-free network rate tracker. Rates are computed against the previous
+    sample's timestamp, so callers never block between two counter reads.
 
+    The auto-selected interface follows the net_core registry: it pushes a
+    new primary on link/address events, and the switch happens on the next
+    sample. If the interface's counters vanish first, the registry is asked
+    to re-read immediately.
+
+    Args:
+        interface (str): Pin a specific NIC. None auto-selects (default: None).
+    """
+
+    # Samples closer together than this reuse the last rates instead of
+    # re-baselining, so concurrent callers don't shrink each other's window
+    MIN_WINDOW_SEC = 0.25
+    # While no usable interface is selected, re-read the registry at most this
+    # often; link events still switch to a new primary right away
+    REFRESH_RETRY_SEC = 5.0
+
+    def __init__(self, interface=None):
+        self.pinned = interface
+        self.interface = interface
+        self.connection_type = "Unknown" if interface else None
+        self.reselections = 0
+        self._last = None
+        self._last_ts = 0.0
+        self._rates = (0.0, 0.0)
+        self._pending = None
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        if interface is None:
+            registry = net_core.get_interface_registry()
+            registry.subscribe(self._on_primary_change)
+            self._select(registry.get_primary())
+
+    def _on_primary_change(self, name, connection_type):
+        # Called from the registry thread; applied under the lock in sample()
+        self._pending = (name, connection_type)
+
+    def _select(self, primary):
+        self.interface, self.connection_type = primary
+        self.reselections += 1
+        self._last = None
+        self._rates = (0.0, 0.0)
+
+    def sample(self, pernic=None):
+        """
+        Returns (recv_MB_per_s, sent_MB_per_s, interface, connection_type).
+        Pass an already-read psutil.net_io_counters(pernic=True) to avoid a
+        second enumeration. The first sample after (re)selection is 0.0.
+        """
+        with self._lock:
+            if pernic is None:
+                try:
+                    pernic = psutil.net_io_counters(pernic=True)
+                except Exception:
+                    pernic = {}
+
+            if self.pinned is None:
+                pending, self._pending = self._pending, None
+                if pending is not None and pending[0] != self.interface:
+                    self._select(pending)
+                elif self.interface not in pernic and \
+                        time.monotonic() - self._last_refresh >= self.REFRESH_RETRY_SEC:
+                    self._last_refresh = time.monotonic()
+                    self._select(net_core.get_interface_registry().refresh())
+            elif self.pinned not in pernic:
+                self._last = None
+                return 0.0, 0.0, self.interface, self.connection_type
+
+            counters = pernic.get(self.interface)
+            if counters is None:
+                return 0.0, 0.0, self.interface, self.connection_type
+
+            now = time.monotonic()
+            if self._last is not None:
+                elapsed = now - self._last_ts
+                if elapsed < self.MIN_WINDOW_SEC:
+                    return self._rates + (self.interface, self.connection_type)
+                recv = max(0, counters.bytes_recv - self._last[0]) / (1024 * 1024) / elapsed
+                sent = max(0, counters.bytes_sent - self._last[1]) / (1024 * 1024) / elapsed
+                self._rates = (round(recv, 3), round(sent, 3))
+            self._last = (counters.bytes_recv, counters.bytes_sent)
+            self._last_ts = now
+            return self._rates + (self.interface, self.connection_type)
+
+
+def nic_rates_between(prev, cur, elapsed):
+    """
+    Per-NIC rates between two psutil.net_io_counters(pernic=True) reads.
+    Returns {nic: {"recv_mb", "sent_mb", "errors", "drops"}} with MB/s and
+    errors/drops per second (in + out), skipping loopback and virtual NICs.
+    """
+    elapsed = max(1e-3, elapsed)
+    mb = 1024 * 1024
+    rates = {}
+    for nic, c in cur.items():
+        p = prev.get(nic)
+        if p is None or net_core.is_excluded_interface(nic):
+            continue
+        rates[nic] = {
+            "recv_mb": max(0, c.bytes_recv - p.bytes_recv) / mb / elapsed,
+            "sent_mb": max(0, c.bytes_sent - p.bytes_sent) / mb / elapsed,
+            "errors": max(0, c.errin + c.errout - p.errin - p.errout) / elapsed,
+            "drops": max(0, c.dropin + c.dropout - p.dropin - p.dropout) / elapsed,
+        }
+    return rates
+
+
+_net_trackers = {}
+
+def get_net_tracker(interface=None):
+    """Shared NetRateTracker for an interface (None = auto-selected)."""
+    tracker = _net_trackers.get(interface)
+    if tracker is None:
+        tracker = _net_trackers.setdefault(interface, NetRateTracker(interface))
+    return tracker
 
 def net_usage_latency(interface=None, ping_target="8.8.8.8", ping_count=3, 
                       interval=0.1, measure_latency=True):
     """
     Measure network usage and optionally latency for a given interface.
-    Enhanced with better error handling and auto-detection.
+    Rates come from the shared NetRateTracker, so this never sleeps; the first
+    call for an interface reports 0.0 MB/s while the baseline is taken.
     
     Args:
         interface (str): Network interface name. If None, auto-detects primary interface.
         ping_target (str): Host to ping for latency measurement (default: 8.8.8.8).
         ping_count (int): Number of pings to send (default: 3).
-        interval (float): Time interval for measuring network I/O (default: 0.1 seconds).
+        interval (float): Accepted for API compatibility; no longer used to sleep.
         measure_latency (bool): Whether to measure latency (default: True). 
                                 Set to False for frequent calls to avoid overhead.
     
@@ -735,57 +1240,13 @@ def net_usage_latency(interface=None, ping_target="8.8.8.8", ping_count=3,
         tuple: (net_in_MB_per_s, net_out_MB_per_s, avg_latency_ms, interface_name, connection_type)
                Returns (0.0, 0.0, None, None, None) on failure.
     """
-    net_in_MB = 0.0
-    net_out_MB = 0.0
     avg_latency = None
-    interface_name = None
-    connection_type = None
     
     try:
-        # Auto-detect interface if not specified
-        if interface is None:
-            result = get_primary_interface()
-            if result == (None, None):
-                return 0.0, 0.0, None, None, None
-            interface_name, connection_type = result
-        else:
-            # If interface is provided as string, use it directly
-            interface_name = interface
-            connection_type = "Unknown"
-        
         # 1. Measure Network Usage
-        try:
-            pernic1 = psutil.net_io_counters(pernic=True)
-            
-            if interface_name not in pernic1:
-                print(f"Warning: Interface '{interface_name}' not found")
-                return 0.0, 0.0, None, interface_name, connection_type
-
-            bytes_recv1 = pernic1[interface_name].bytes_recv
-            bytes_sent1 = pernic1[interface_name].bytes_sent
-
-            time.sleep(interval)
-
-            pernic2 = psutil.net_io_counters(pernic=True)
-            
-            if interface_name not in pernic2:
-                print(f"Warning: Interface '{interface_name}' disappeared during measurement")
-                return 0.0, 0.0, None, interface_name, connection_type
-
-            bytes_recv2 = pernic2[interface_name].bytes_recv
-            bytes_sent2 = pernic2[interface_name].bytes_sent
-
-            # Calculate throughput in MB/s
-            delta_recv = max(0, bytes_recv2 - bytes_recv1)  # Prevent negative values
-            delta_sent = max(0, bytes_sent2 - bytes_sent1)
-            
-            net_in_MB = round(delta_recv / 1024 / 1024 / interval, 3)
-            net_out_MB = round(delta_sent / 1024 / 1024 / interval, 3)
-
-        except KeyError as e:
-            print(f"Network interface error: {e}")
-        except Exception as e:
-            print(f"Network usage measurement failed: {e}")
+        net_in_MB, net_out_MB, interface_name, connection_type = get_net_tracker(interface).sample()
+        if interface_name is None:
+            return 0.0, 0.0, None, None, None
 
         # 2. Measure Latency (optional)
         if measure_latency:
@@ -798,4 +1259,156 @@ def net_usage_latency(interface=None, ping_target="8.8.8.8", ping_count=3,
         
     except Exception as e:
         print(f"Unexpected error in net_usage_latency: {e}")
-        return 0.0, 0.0, None, None, None
\ No newline at end of file
+        return 0.0, 0.0, None, None, None
+
+# ---- Single-pass snapshot sampler ----
+class Snapshot(NamedTuple):
+    """
+    One timestamped reading of every fast-moving metric.
+    CPU % and disk rates are computed against the previous snapshot, network
+    rates by the shared NetRateTracker, so every consumer of the same record
+    sees identical numbers.
+    """
+    timestamp: float            # wall clock, time.time()
+    monotonic: float            # time.monotonic(), used for rate math
+    cpu_percent: float
+    cpu_counters: Any           # read_cpu_counters() matrix
+    cpu_cores: Optional[dict]   # cpu_core_breakdown() vs the previous snapshot
+    memory: Any                 # psutil.virtual_memory() result
+    disk_counters: dict         # read_disk_counters() result
+    disk: Optional[dict]        # disk_rates_between() vs the previous snapshot
+    disk_read_mb: float
+    disk_write_mb: float
+    net_io: dict                # psutil.net_io_counters(pernic=True) result
+    net_interface: Optional[str]
+    net_recv_mb: float
+    net_sent_mb: float
+    nics: dict                  # nic_rates_between() vs the previous snapshot
+    net_counters: dict          # tcp_core.read_net_counters() result
+    net_health: Optional[dict]  # tcp_core.net_health_between() vs the previous snapshot
+    cpu_temp: Optional[float]
+    cpu_core_temps: list        # per-core °C, empty if not exposed
+    gpu: Optional[dict]         # {"usage", "temp", "clock"} or None
+
+    @property
+    def ram_percent(self):
+        return self.memory.percent if self.memory else 0.0
+
+    @property
+    def ram_info(self):
+        """Same shape as get_ram_info()."""
+        if not self.memory:
+            return {"used": 0.0, "available": 0.0}
+        return {
+            "used": round(self.memory.used / (1024**3), 2),
+            "available": round(self.memory.available / (1024**3), 2),
+        }
+
+    @property
+    def gpu_usage(self):
+        return self.gpu.get("usage") if self.gpu else None
+
+    @property
+    def gpu_temp(self):
+        return self.gpu.get("temp") if self.gpu else None
+
+    @property
+    def gpu_clock(self):
+        """GPU clock formatted like get_gpu_clock_speed()."""
+        clock = self.gpu.get("clock") if self.gpu else None
+        return f"{clock:>.0f}" if clock is not None else "N/A"
+
+
+_last_snapshot = None
+
+def sample_all(previous=None, interface=None):
+    """
+    Read every kernel source once and return a Snapshot.
+
+    Args:
+        previous (Snapshot): Baseline for rate calculations. Defaults to the
+                             last snapshot taken by any caller.
+        interface (str): NIC to report rates for. Defaults to the shared
+                         auto-selected interface (see NetRateTracker).
+
+    Rates are 0.0 on the very first call since there's no baseline yet.
+    """
+    global _last_snapshot
+    if previous is None:
+        previous = _last_snapshot
+
+    now = time.time()
+    mono = time.monotonic()
+
+    cpu_counters = read_cpu_counters()
+    net_counters = tcp_core.read_net_counters()
+    try:
+        memory = psutil.virtual_memory()
+    except Exception:
+        memory = None
+    disk_counters = read_disk_counters()
+    try:
+        net_io = psutil.net_io_counters(pernic=True)
+    except Exception:
+        net_io = {}
+
+    cpu_temp = get_cpu_temp()
+    cpu_core_temps = get_cpu_core_temps()
+    gpu = get_gpu_stats()
+
+    cpu_percent = 0.0
+    cpu_cores = None
+    disk = None
+    nics = {}
+    net_health = None
+    disk_read_mb = disk_write_mb = 0.0
+    net_recv_mb, net_sent_mb, interface, _ = get_net_tracker(interface).sample(net_io)
+    if previous is not None:
+        elapsed = max(1e-3, mono - previous.monotonic)
+        cpu_cores = cpu_core_breakdown(previous.cpu_counters, cpu_counters)
+        if cpu_cores is not None:
+            cpu_percent = cpu_cores["total"]
+        if disk_counters and previous.disk_counters:
+            disk = disk_rates_between(previous.disk_counters, disk_counters, elapsed,
+                                      _stacked_disks(disk_counters))
+            disk_read_mb, disk_write_mb = disk["read_mb"], disk["write_mb"]
+        nics = nic_rates_between(previous.net_io, net_io, elapsed)
+        if net_counters and previous.net_counters:
+            net_health = tcp_core.net_health_between(previous.net_counters, net_counters, elapsed)
+
+    snap = Snapshot(
+        timestamp=now,
+        monotonic=mono,
+        cpu_percent=cpu_percent,
+        cpu_counters=cpu_counters,
+        cpu_cores=cpu_cores,
+        memory=memory,
+        disk_counters=disk_counters,
+        disk=disk,
+        disk_read_mb=disk_read_mb,
+        disk_write_mb=disk_write_mb,
+        net_io=net_io,
+        net_interface=interface,
+        net_recv_mb=net_recv_mb,
+        net_sent_mb=net_sent_mb,
+        nics=nics,
+        net_counters=net_counters,
+        net_health=net_health,
+        cpu_temp=cpu_temp,
+        cpu_core_temps=cpu_core_temps,
+        gpu=gpu,
+    )
+    _last_snapshot = snap
+    return snap
+
+def get_last_snapshot(max_age=None):
+    """
+    Return the most recent Snapshot taken by sample_all(), or None if there is
+    none yet (or it is older than `max_age` seconds).
+    """
+    snap = _last_snapshot
+    if snap is None:
+        return None
+    if max_age is not None and time.monotonic() - snap.monotonic > max_age:
+        return None
+    return snap
@@ -0,0 +1,262 @@
+"""
+Network Interface Registry
+Keeps the primary-interface choice current without polling. On Linux a
+thread listens for rtnetlink link/address events and interfaces are
+classified from /sys/class/net (wireless/, type, device link); elsewhere a
+slow poll stands in for the events and name heuristics do the classifying.
+Consumers subscribe and get the new (name, type) pushed to them.
+"""
+
+import errno
+import os
+import platform
+import socket
+import struct
+import threading
+import time
+
+import psutil
+
+RTNETLINK_AVAILABLE = hasattr(socket, "AF_NETLINK")
+
+# ---- rtnetlink constants (linux/rtnetlink.h) ----
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+RTM_NEWLINK, RTM_DELLINK, RTM_NEWADDR, RTM_DELADDR = 16, 17, 20, 21
+NLMSG_HDR = struct.Struct("=IHHII")
+
+# /sys/class/net/*/type values (linux/if_arp.h)
+ARPHRD_ETHER = 1
+ARPHRD_LOOPBACK = 772
+
+# Wait for a burst of events (DHCP renew, roaming) to settle before re-reading
+EVENT_SETTLE_SEC = 0.3
+# Re-check interval where no event source exists
+POLL_INTERVAL_SEC = 5.0
+
+VIRTUAL_NAME_HINTS = ("docker", "veth", "virtual", "vmnet", "vbox")
+
+
+def is_excluded_interface(name):
+    """Loopback and name-matched virtual interfaces (VPN tunnels stay in)."""
+    low = name.lower()
+    return low in ("lo", "loopback") or any(x in low for x in VIRTUAL_NAME_HINTS)
+
+def _classify_by_name(name, system=None):
+    """Name-substring heuristics; the only option off Linux."""
+    system = system or platform.system()
+    low = name.lower()
+    if low in ("lo", "loopback") or low.startswith("loopback"):
+        return "Loopback"
+    if any(x in low for x in VIRTUAL_NAME_HINTS):
+        return "Virtual"
+    if system == "Windows":
+        if "wi-fi" in low or "wireless" in low or "wlan" in low:
+            return "WiFi"
+        if "ethernet" in low or "local area" in low or "lan" in low:
+            return "Ethernet"
+    elif system == "Linux":
+        if "wlan" in low or "wifi" in low or "wlp" in low:
+            return "WiFi"
+        if "eth" in low or "enp" in low or "eno" in low or "ens" in low:
+            return "Ethernet"
+    return "Unknown"
+
+def classify_interface(name, sysfs_root="/sys"):
+    """
+    "WiFi", "Ethernet", "Loopback", "Virtual" or "Unknown" for an interface.
+    Uses /sys/class/net when present, name heuristics otherwise.
+    """
+    base = os.path.join(sysfs_root, "class", "net", name)
+    if not os.path.isdir(base):
+        return _classify_by_name(name)
+    if os.path.exists(os.path.join(base, "wireless")) or os.path.exists(os.path.join(base, "phy80211")):
+        return "WiFi"
+    try:
+        with open(os.path.join(base, "type")) as f:
+            arp_type = int(f.read().strip())
+    except (OSError, ValueError):
+        return _classify_by_name(name)
+    if arp_type == ARPHRD_LOOPBACK:
+        return "Loopback"
+    # Bridges, veth, ifb, tun and friends have no backing device
+    if not os.path.exists(os.path.join(base, "device")):
+        return "Virtual"
+    if arp_type == ARPHRD_ETHER:
+        return "Ethernet"
+    return "Unknown"
+
+
+class InterfaceRegistry:
+    """
+    Current view of the network interfaces and the chosen primary one.
+
+    Args:
+        sysfs_root (str): /sys location used for classification.
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sysfs_root = sysfs_root
+        self.interfaces = {}
+        self.primary = (None, None)
+        self.refreshes = 0
+        self.events = 0
+        self.source = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self.refresh()
+
+    # ---- Selection ----
+    def refresh(self):
+        """Re-enumerate interfaces and re-pick the primary; notify on change."""
+        try:
+            stats = psutil.net_io_counters(pernic=True)
+            addrs = psutil.net_if_addrs()
+            if_stats = psutil.net_if_stats()
+        except Exception as e:
+            print(f"Error detecting primary interface: {e}")
+            return self.primary
+
+        interfaces = {}
+        for name in stats:
+            if name not in addrs or name not in if_stats:
+                continue
+            interfaces[name] = {
+                "type": classify_interface(name, self.sysfs_root),
+                "up": if_stats[name].isup,
+                "has_ipv4": any(addr.family == socket.AF_INET for addr in addrs[name]),
+                "bytes": stats[name].bytes_sent + stats[name].bytes_recv,
+            }
+
+        candidates = [(name, info) for name, info in interfaces.items()
+                      if info["up"] and info["has_ipv4"] and info["type"] != "Loopback"]
+        # Prefer WiFi/Ethernet, then the busiest; virtual links only as a last
+        # resort (a container's veth eth0 is still the way out)
+        candidates.sort(key=lambda c: (c[1]["type"] not in ("WiFi", "Ethernet"),
+                                       c[1]["type"] == "Virtual", -c[1]["bytes"]))
+        primary = (candidates[0][0], candidates[0][1]["type"]) if candidates else (None, None)
+
+        with self._lock:
+            self.interfaces = interfaces
+            changed = primary != self.primary
+            self.primary = primary
+            self.refreshes += 1
+            subscribers = list(self._subscribers)
+        if changed:
+            for callback in subscribers:
+                try:
+                    callback(*primary)
+                except Exception as e:
+                    print(f"Interface change subscriber failed: {e}")
+        return primary
+
+    def get_primary(self):
+        """(name, connection_type) of the current primary interface, or (None, None)."""
+        return self.primary
+
+    # ---- Push notifications ----
+    def subscribe(self, callback):
+        """Call callback(name, connection_type) whenever the primary interface changes."""
+        with self._lock:
+            self._subscribers.append(callback)
+        self.start()
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self):
+        """Start the event listener (rtnetlink on Linux, slow poll elsewhere)."""
+        if self._thread is not None:
+            return
+        self._running = True
+        target = self._poll_loop
+        if RTNETLINK_AVAILABLE:
+            try:
+                sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+                sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+                target = lambda: self._netlink_loop(sock)
+                self.source = "rtnetlink"
+            except OSError as e:
+                print(f"rtnetlink unavailable ({e}), polling interfaces instead")
+        if self.source is None:
+            self.source = "poll"
+        self._thread = threading.Thread(target=target, name="iface-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def _netlink_loop(self, sock):
+        with sock:
+            sock.settimeout(1.0)
+            while self._running:
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                except OSError as e:
+                    if e.errno != errno.ENOBUFS:
+                        # Socket is unusable (EBADF etc.): stop listening, poll instead
+                        print(f"rtnetlink read error ({e}), polling interfaces instead")
+                        break
+                    # ENOBUFS: we fell behind and lost events; a refresh resynchronises
+                    data = None
+                if data is not None and not self._is_interface_event(data):
+                    continue
+                self.events += 1
+                self._drain(sock)
+                self.refresh()
+        if self._running:
+            self.source = "poll"
+            self._poll_loop()
+
+    def _drain(self, sock):
+        """Swallow the rest of an event burst so one change means one refresh."""
+        deadline = time.monotonic() + EVENT_SETTLE_SEC
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sock.settimeout(remaining)
+            try:
+                sock.recv(65536)
+            except (socket.timeout, OSError):
+                break
+        sock.settimeout(1.0)
+
+    @staticmethod
+    def _is_interface_event(data):
+        pos = 0
+        while pos + NLMSG_HDR.size <= len(data):
+            length, kind, _, _, _ = NLMSG_HDR.unpack_from(data, pos)
+            if kind in (RTM_NEWLINK, RTM_DELLINK, RTM_NEWADDR, RTM_DELADDR):
+                return True
+            if length < NLMSG_HDR.size:
+                break
+            pos += (length + 3) & ~3
+        return False
+
+    def _poll_loop(self):
+        while self._running:
+            time.sleep(POLL_INTERVAL_SEC)
+            self.refresh()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_interface_registry():
+    """Shared InterfaceRegistry, created and started on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = InterfaceRegistry()
+                _registry.start()
+    return _registry
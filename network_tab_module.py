@@ -3,6 +3,7 @@ Network Monitor Tab Module - Integrated Version
 Combines network statistics monitoring with game server ping testing
 """
 
+import asyncio
 import os
 import re
 import subprocess
@@ -13,6 +14,9 @@ import ttkbootstrap
 import threading
 from concurrent.futures import ThreadPoolExecutor
 from constants import *
+import latency_core
+import latency_store
+import tcp_core
 
 
 # ============================================================================
@@ -35,8 +39,11 @@ def load_game_servers(filepath=DEFAULT_SERVERS_FILE):
         try:
             with open(filepath, 'w') as f:
                 f.write("# Game Server Configuration (Riot Games)\n")
-                f.write("# Format: ServerName,Region,IPAddress,FallbackDNS(optional)\n")
+                f.write("# Format: ServerName,Region,IPAddress,FallbackDNS(optional),Port(optional)\n")
                 f.write("# Fallback DNS will be used if main server doesn't respond to ping\n")
+                f.write("# Port times TCP connects (443 or tcp:443) or UDP replies (udp:5000)\n")
+                f.write("# instead of ICMP, for servers that drop ping. Leave FallbackDNS empty\n")
+                f.write("# to skip it: Name,Region,1.2.3.4,,tcp:443\n")
                 f.write("# Add more servers below - one per line\n\n")
                 f.write("# Riot Games Servers\n")
                 f.write("Riot NA,US-West,104.160.131.1,8.8.8.8\n")
@@ -62,14 +69,21 @@ def load_game_servers(filepath=DEFAULT_SERVERS_FILE):
                     server_name = parts[0]
                     region = parts[1]
                     ip = parts[2]
-                    fallback = parts[3] if len(parts) >= 4 else None
+                    fallback = parts[3] if len(parts) >= 4 and parts[3] else None
+                    try:
+                        probe, port = latency_core.parse_probe_spec(parts[4] if len(parts) >= 5 else "")
+                    except ValueError as e:
+                        print(f"Server '{server_name}': bad port column ({e}), using ICMP")
+                        probe, port = "icmp", None
                     
                     key = server_name.lower().replace(' ', '_').replace('-', '_')
                     servers[key] = {
                         "name": server_name, 
                         "region": region, 
                         "ip": ip,
-                        "fallback": fallback
+                        "fallback": fallback,
+                        "probe": probe,
+                        "port": port
                     }
         
         if not servers:
@@ -104,6 +118,16 @@ class PingCache:
 
 
 def ping_server_fast(host_address, ping_count=10):
+    """
+    Ping a server and return avg/min/max/jitter/packet_loss/sent/received.
+    Uses the native ICMP prober when the OS allows unprivileged ICMP sockets,
+    otherwise forks the system `ping` and parses its output.
+    """
+    if latency_core.icmp_available():
+        return latency_core.ping_stats(host_address, count=ping_count)
+    return _ping_server_subprocess(host_address, ping_count)
+
+def _ping_server_subprocess(host_address, ping_count=10):
     """Fast ping with minimal parsing."""
     try:
         is_windows = os.name == 'nt'
@@ -255,6 +279,16 @@ def create_network_tab_integrated(f_net, info_labels, FONT_NETTXT, CRT_GREEN):
     )
     ping_btn.grid(row=0, column=2, sticky="e", padx=(0, 2))
 
+    # Sweep button - pings every configured server at once
+    sweep_btn = tb.Button(
+        server_select_frame,
+        text="Sweep",
+        command=None,  # Set later
+        bootstyle="success-outline",
+        width=8
+    )
+    sweep_btn.grid(row=0, column=3, sticky="e", padx=(0, 2))
+
     # Config button - uses success-outline bootstyle
     config_btn = tb.Button(
         server_select_frame,
@@ -263,7 +297,7 @@ def create_network_tab_integrated(f_net, info_labels, FONT_NETTXT, CRT_GREEN):
         bootstyle="success-outline",
         width=3
     )
-    config_btn.grid(row=0, column=3, sticky="e")
+    config_btn.grid(row=0, column=4, sticky="e")
 
     # Status label for ping results
     ping_status_lbl = tk.Label(
@@ -314,6 +348,7 @@ def create_network_tab_integrated(f_net, info_labels, FONT_NETTXT, CRT_GREEN):
     info_labels["ServerCombo"] = server_combo
     info_labels["SelectedServer"] = selected_server
     info_labels["PingButton"] = ping_btn
+    info_labels["SweepButton"] = sweep_btn
     info_labels["PingStatus"] = ping_status_lbl
     info_labels["ResultsText"] = results_text
     info_labels["ConfigButton"] = config_btn
@@ -325,6 +360,7 @@ def create_network_tab_integrated(f_net, info_labels, FONT_NETTXT, CRT_GREEN):
     # Return tab-specific data
     return {
         "ping_btn": ping_btn,
+        "sweep_btn": sweep_btn,
         "config_btn": config_btn
     }
 
@@ -347,8 +383,16 @@ class NetworkTabController:
         self.root = root
         self.info_labels = info_labels
         
-        # Initialize threading
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # One worker drives the asyncio probe loop; the rest run subprocess
+        # pings when native ICMP isn't available (bounded by the sweep limit)
+        self.executor = ThreadPoolExecutor(max_workers=PING_SWEEP_CONCURRENCY + 2)
+        self.sweeping = False
+        
+        # Passive kernel RTT for live connections to the configured servers
+        self.tcp_collector = tcp_core.TcpRttCollector() if tcp_core.SOCK_DIAG_AVAILABLE else None
+        
+        # Every probe result is kept on disk for the 1h/24h/7d history
+        self.store = latency_store.get_latency_store()
         
         # Load servers
         self.servers = {}
@@ -361,6 +405,7 @@ class NetworkTabController:
         """Load game servers and populate the dropdown."""
         self.servers = load_game_servers()
         self.server_list = list(self.servers.keys())
+        self.executor.submit(self._prefetch_addresses)
         
         # Format server names for dropdown
         display_names = [f"{self.servers[k]['name']} ({self.servers[k]['region']})" 
@@ -399,30 +444,181 @@ class NetworkTabController:
             return
         
         server = self.servers[server_key]
+        target = f"{server['probe'].upper()} {server['port']}" if server.get('port') else "ICMP"
         
         # Update UI
         ping_btn.config(state='disabled', text="...")
-        status_lbl.config(text=f"Pinging {server['name']}...", foreground="#ffaa00")
+        status_lbl.config(text=f"Pinging {server['name']} ({target})...", foreground="#ffaa00")
         self.info_labels["LatencyMode"] = "server"
         latency_lbl.config(text="Latency: Pinging...", foreground="#ffaa00")
         
-        # Run in background thread
-        def ping_thread():
-            stats = ping_server_fast(server['ip'], ping_count=15)
+        # Primary and fallback are probed at the same time
+        def ping_task():
+            stats, used_fallback = asyncio.run(latency_core.probe_target(
+                server['ip'], server.get('fallback'), self._probe_fn(15),
+                self._server_probe_fn(server, 15)))
             
-            # Try fallback if needed
-            used_fallback = False
-            if stats is None and server.get('fallback'):
-                stats = ping_server_fast(server['fallback'], ping_count=15)
-                used_fallback = True if stats is not None else False
+            live = self._live_tcp_summary(latency_core.get_resolver_cache().address(server['ip']))
+            history = self._record_result(server_key, stats, used_fallback, wait=True)
             
             # Update UI on main thread
-            self.root.after(0, self.display_ping_results, server, stats, used_fallback)
+            self.root.after(0, self.display_ping_results, server, stats, used_fallback, live, history)
         
-        threading.Thread(target=ping_thread, daemon=True).start()
+        self.executor.submit(ping_task)
+    
+    def _prefetch_addresses(self):
+        """Resolve every server and fallback host in parallel, once, at load time."""
+        cache = latency_core.get_resolver_cache()
+        hosts = [h for srv in self.servers.values() for h in (srv['ip'], srv.get('fallback'))]
+        try:
+            timings = asyncio.run(cache.prefetch(hosts))
+        except Exception as e:
+            print(f"Server address prefetch failed: {e}")
+            return
+        failed = [h for h, ms in timings.items() if ms is None and not cache.is_literal(h)]
+        if failed:
+            print(f"Could not resolve: {', '.join(failed)}")
+        # Kernel sockets report peers by address, so filter on the resolved IPs
+        if self.tcp_collector:
+            self.tcp_collector.set_filter(cache.address(srv['ip']) for srv in self.servers.values())
+    
+    def _record_result(self, key, stats, used_fallback, wait=False):
+        """Queue a result for the history store; with wait, return its window summary."""
+        if not self.store:
+            return None
+        server = self.servers[key]
+        host = server.get('fallback') if used_fallback else server['ip']
+        self.store.record(key, stats, host=host, used_fallback=used_fallback)
+        if not wait:
+            return None
+        try:
+            self.store.flush()
+            return self.store.history(key)
+        except Exception as e:
+            print(f"Latency history query failed: {e}")
+            return None
     
-    def display_ping_results(self, server, stats, used_fallback=False):
-        """Display ping results and update latency display."""
+    def _live_tcp_summary(self, ip):
+        """Kernel-measured RTT of open connections to `ip` (e.g. a running game), or None."""
+        if not self.tcp_collector:
+            return None
+        try:
+            return self.tcp_collector.summary_for(ip)
+        except OSError as e:
+            print(f"sock_diag query failed: {e}")
+            return None
+    
+    def _probe_fn(self, count):
+        """Async probe(host) -> stats: native ICMP, or subprocess ping on the executor."""
+        if latency_core.icmp_available():
+            async def probe(host):
+                return await latency_core.icmp_probe(host, count)
+        else:
+            async def ping_ip(ip):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, _ping_server_subprocess, ip, count)
+            
+            async def probe(host):
+                # Resolve through the shared cache so `ping` gets an IP, not a name
+                return await latency_core.probe_resolved(host, ping_ip)
+        return probe
+    
+    def _server_probe_fn(self, server, count):
+        """Port probe for servers with a port column, else None (use ICMP)."""
+        if server.get('port'):
+            return latency_core.make_port_probe(server['probe'], server['port'], count)
+        return None
+    
+    def run_server_sweep(self):
+        """Probe every configured server concurrently and rank them."""
+        if self.sweeping or not self.servers:
+            return
+        self.sweeping = True
+        
+        ping_btn = self.info_labels["PingButton"]
+        sweep_btn = self.info_labels.get("SweepButton")
+        status_lbl = self.info_labels["PingStatus"]
+        results_text = self.info_labels["ResultsText"]
+        
+        ping_btn.config(state='disabled')
+        if sweep_btn:
+            sweep_btn.config(state='disabled', text="...")
+        total = len(self.servers)
+        status_lbl.config(text=f"Sweeping {total} servers...", foreground="#ffaa00")
+        
+        results_text.config(state=tk.NORMAL)
+        results_text.delete(1.0, tk.END)
+        results_text.insert(tk.END, f"{'SERVER':<24}{'P50':>8}{'AVG':>8}{'LOSS':>7}\n{'-'*47}\n")
+        results_text.config(state=tk.DISABLED)
+        
+        targets = {key: (srv['ip'], srv.get('fallback'), self._server_probe_fn(srv, PING_SWEEP_COUNT))
+                   for key, srv in self.servers.items()}
+        started = time.perf_counter()
+        
+        def on_result(key, stats, used_fallback):
+            self._record_result(key, stats, used_fallback)
+            self.root.after(0, self._append_sweep_result, key, stats, used_fallback)
+        
+        def sweep_task():
+            try:
+                results = asyncio.run(latency_core.sweep_targets(
+                    targets, on_result, PING_SWEEP_CONCURRENCY, self._probe_fn(PING_SWEEP_COUNT)))
+            except Exception as e:
+                print(f"Server sweep error: {e}")
+                results = {}
+            self.root.after(0, self._finish_sweep, results, time.perf_counter() - started)
+        
+        self.executor.submit(sweep_task)
+    
+    def _format_sweep_row(self, key, stats, used_fallback):
+        server = self.servers[key]
+        name = f"{server['name']}{'*' if used_fallback else ''}"[:23]
+        if stats is None:
+            return f"{name:<24}{'UNREACHABLE':>23}\n"
+        p50 = stats.get('p50', stats['avg'])
+        return f"{name:<24}{p50:>6.1f}ms{stats['avg']:>6.1f}ms{stats['packet_loss']:>6.0f}%\n"
+    
+    def _append_sweep_result(self, key, stats, used_fallback):
+        """Stream one finished server into the results text."""
+        results_text = self.info_labels["ResultsText"]
+        results_text.config(state=tk.NORMAL)
+        results_text.insert(tk.END, self._format_sweep_row(key, stats, used_fallback))
+        results_text.see(tk.END)
+        results_text.config(state=tk.DISABLED)
+    
+    def _finish_sweep(self, results, elapsed):
+        """Replace the streamed rows with the ranked table."""
+        self.sweeping = False
+        ping_btn = self.info_labels["PingButton"]
+        sweep_btn = self.info_labels.get("SweepButton")
+        status_lbl = self.info_labels["PingStatus"]
+        results_text = self.info_labels["ResultsText"]
+        
+        ping_btn.config(state='normal')
+        if sweep_btn:
+            sweep_btn.config(state='normal', text="Sweep")
+        
+        ranked = latency_core.rank_results(results)
+        reachable = sum(1 for _, stats, _ in ranked if stats is not None)
+        
+        lines = [f"RANKED BY P50 / LOSS  ({elapsed:.1f}s, * = fallback)\n",
+                 f"{'SERVER':<24}{'P50':>8}{'AVG':>8}{'LOSS':>7}\n{'-'*47}\n"]
+        lines += [f"{i:>2}. {self._format_sweep_row(key, stats, fb)}"
+                  for i, (key, stats, fb) in enumerate(ranked, 1)]
+        
+        results_text.config(state=tk.NORMAL)
+        results_text.delete(1.0, tk.END)
+        results_text.insert(1.0, "".join(lines))
+        results_text.config(state=tk.DISABLED)
+        
+        if ranked and ranked[0][1] is not None:
+            best = self.servers[ranked[0][0]]['name']
+            status_lbl.config(text=f"✓ {reachable}/{len(ranked)} reachable - best: {best}", foreground=CRT_GREEN)
+        else:
+            status_lbl.config(text="❌ No servers reachable", foreground=CRT_RED)
+    
+    def display_ping_results(self, server, stats, used_fallback=False, live=None, history=None):
+        """Display ping results (plus live TCP RTT and stored history) and update latency display."""
         ping_btn = self.info_labels["PingButton"]
         status_lbl = self.info_labels["PingStatus"]
         results_text = self.info_labels["ResultsText"]
@@ -467,8 +663,14 @@ class NetworkTabController:
             )
             
             # Format results
+            method = stats.get('method')
+            probe_line = f"Probe: {method.upper()} connect" if method else "Probe: ICMP echo"
+            if stats.get('resolve_ms') is not None:
+                probe_line += (f" | DNS {stats['resolve_ms']:.1f} ms"
+                               f"{' (cached)' if stats.get('dns_cached') else ''}")
             result = f"""Server: {server['name']} ({server['region']})
 IP: {server['ip']}
+{probe_line}
 {'⚠ Using fallback DNS: ' + server.get('fallback', '') if used_fallback else ''}
 
 {'='*45}
@@ -484,6 +686,21 @@ Packet Loss:  {stats['packet_loss']:.0f}% ({stats['received']}/{stats['sent']})
 Status: {status}
 """
         
+        if live:
+            result += (f"\nLive TCP (kernel): {live['connections']} conn, "
+                       f"srtt {live['rtt_ms']:.1f} ms ±{live['rttvar_ms']:.1f}, "
+                       f"retrans {live['total_retrans']} (+{live['new_retrans']})\n")
+        
+        if history:
+            result += f"\nHISTORY  {'P50':>8}{'P95':>9}{'LOSS':>7}{'N':>6}\n"
+            for label, window in history.items():
+                if window is None:
+                    result += f"{label:<9}{'no data':>30}\n"
+                    continue
+                p50 = f"{window['p50']:.1f}ms" if window['p50'] is not None else "--"
+                p95 = f"{window['p95']:.1f}ms" if window['p95'] is not None else "--"
+                result += f"{label:<9}{p50:>8}{p95:>9}{window['loss']:>6.1f}%{window['count']:>6}\n"
+        
         # Update text widget
         results_text.config(state=tk.NORMAL)
         results_text.delete(1.0, tk.END)
@@ -529,6 +746,8 @@ Status: {status}
         """Clean shutdown of background threads."""
         self.monitoring = False
         self.executor.shutdown(wait=False)
+        if self.store:
+            self.store.close()
 
 
 # ============================================================================
@@ -584,6 +803,7 @@ def integrate_network_tab_to_gui(root, widgets, FONT_NETTXT, CRT_GREEN):
     
     # Wire up the button commands
     tab_widgets["ping_btn"].config(command=controller.run_server_ping_test)
+    tab_widgets["sweep_btn"].config(command=controller.run_server_sweep)
     tab_widgets["config_btn"].config(command=controller.open_server_config)
     
     # Load servers
@@ -72,8 +72,8 @@ def test_data_sources():
     
     # Test Disk I/O data
     try:
-        disk_io = core.get_disk_io() if hasattr(core, 'get_disk_io') else None
-        if disk_io and isinstance(disk_io, dict):
+        disk_io = core.DiskRateTracker().sample() if hasattr(core, 'DiskRateTracker') else None
+        if disk_io and disk_io.get("devices"):
             status['Disk I/O'] = 'detected'
         else:
             status['Disk I/O'] = 'missing'
@@ -0,0 +1,298 @@
+"""
+TCP Diagnostics
+Passive, kernel-measured TCP path health. Established connections are
+dumped over a raw NETLINK_SOCK_DIAG socket (pure Python, no ss/iproute2)
+and their tcp_info gives smoothed RTT, RTT variance and retransmits per
+remote endpoint without sending a single probe packet. Linux only.
+"""
+
+import ipaddress
+import os
+import socket
+import struct
+import threading
+
+SOCK_DIAG_AVAILABLE = hasattr(socket, "AF_NETLINK")
+
+# ---- netlink / inet_diag constants (linux/netlink.h, linux/inet_diag.h) ----
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+INET_DIAG_INFO = 2
+TCP_ESTABLISHED = 1
+
+NLMSG_HDR = struct.Struct("=IHHII")
+# family, protocol, ext, pad, states, sport, dport, src[16], dst[16], if, cookie[2]
+INET_DIAG_REQ_V2 = struct.Struct("=BBBxIHH16s16sI8s")
+# family, state, timer, retrans, sport, dport, src, dst, if, cookie, expires, rqueue, wqueue, uid, inode
+# (ports are network byte order inside a host-order struct, so they stay raw here)
+INET_DIAG_MSG = struct.Struct("=BBBB2s2s16s16sI8sIIIII")
+RTATTR_HDR = struct.Struct("=HH")
+# Leading tcp_info fields we use; older kernels stop right after total_retrans
+TCP_INFO = struct.Struct("=BBBBBBBBIIIIIIIIIIIIIIIIIIIIIIII")
+TCP_INFO_FIELDS = (
+    "state", "ca_state", "retransmits", "probes", "backoff", "options", "wscale", "flags",
+    "rto", "ato", "snd_mss", "rcv_mss",
+    "unacked", "sacked", "lost", "retrans", "fackets",
+    "last_data_sent", "last_ack_sent", "last_data_recv", "last_ack_recv",
+    "pmtu", "rcv_ssthresh", "rtt", "rttvar", "snd_ssthresh", "snd_cwnd", "advmss", "reordering",
+    "rcv_rtt", "rcv_space", "total_retrans",
+)
+
+# Kernel batches many sockets into each read of this size
+RECV_BUFFER = 1 << 18
+
+
+def _align(n):
+    return (n + 3) & ~3
+
+def _addr_text(family, raw):
+    if family == socket.AF_INET:
+        return socket.inet_ntop(family, raw[:4])
+    addr = ipaddress.IPv6Address(raw)
+    # Dual-stack sockets report IPv4 peers as ::ffff:a.b.c.d
+    return str(addr.ipv4_mapped) if addr.ipv4_mapped else str(addr)
+
+def _build_request(family, seq, states):
+    req = INET_DIAG_REQ_V2.pack(
+        family, socket.IPPROTO_TCP, 1 << (INET_DIAG_INFO - 1), states,
+        0, 0, b"\0" * 16, b"\0" * 16, 0, b"\xff" * 8)
+    header = NLMSG_HDR.pack(NLMSG_HDR.size + len(req), SOCK_DIAG_BY_FAMILY,
+                            NLM_F_REQUEST | NLM_F_DUMP, seq, 0)
+    return header + req
+
+def parse_diag_message(payload):
+    """One inet_diag_msg (+ attributes) -> per-socket dict, or None if malformed."""
+    if len(payload) < INET_DIAG_MSG.size:
+        return None
+    (family, state, _timer, _retrans, sport, dport, src, dst, _ifindex, cookie,
+     _expires, rqueue, wqueue, uid, inode) = INET_DIAG_MSG.unpack_from(payload)
+    entry = {
+        "family": family,
+        "state": state,
+        "local_ip": _addr_text(family, src),
+        "local_port": int.from_bytes(sport, "big"),
+        "remote_ip": _addr_text(family, dst),
+        "remote_port": int.from_bytes(dport, "big"),
+        "rqueue": rqueue,
+        "wqueue": wqueue,
+        "uid": uid,
+        "inode": inode,
+        "cookie": cookie,
+        "info": None,
+    }
+    pos = INET_DIAG_MSG.size
+    while pos + RTATTR_HDR.size <= len(payload):
+        length, kind = RTATTR_HDR.unpack_from(payload, pos)
+        if length < RTATTR_HDR.size:
+            break
+        if kind == INET_DIAG_INFO:
+            data = payload[pos + RTATTR_HDR.size:pos + length]
+            # Kernels older than the full layout are zero-padded
+            data = data[:TCP_INFO.size].ljust(TCP_INFO.size, b"\0")
+            entry["info"] = dict(zip(TCP_INFO_FIELDS, TCP_INFO.unpack(data)))
+        pos += _align(length)
+    return entry
+
+def dump_tcp_sockets(families=(socket.AF_INET, socket.AF_INET6), states=1 << TCP_ESTABLISHED):
+    """
+    Yield a dict per TCP socket matching `states` (bitmask of TCP_* states,
+    established only by default), with tcp_info attached under "info".
+    Raises OSError if sock_diag isn't available.
+    """
+    if not SOCK_DIAG_AVAILABLE:
+        raise OSError("sock_diag netlink is only available on Linux")
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_SOCK_DIAG) as nl:
+        nl.bind((0, 0))
+        for seq, family in enumerate(families, 1):
+            nl.send(_build_request(family, seq, states))
+            done = False
+            while not done:
+                data = nl.recv(RECV_BUFFER)
+                if not data:
+                    break
+                pos = 0
+                while pos + NLMSG_HDR.size <= len(data):
+                    length, kind, _flags, msg_seq, _pid = NLMSG_HDR.unpack_from(data, pos)
+                    if length < NLMSG_HDR.size:
+                        done = True
+                        break
+                    if msg_seq == seq:
+                        if kind == NLMSG_DONE:
+                            done = True
+                        elif kind == NLMSG_ERROR:
+                            errno = -struct.unpack_from("=i", data, pos + NLMSG_HDR.size)[0]
+                            if errno:
+                                raise OSError(errno, os.strerror(errno))
+                            done = True
+                        elif kind == SOCK_DIAG_BY_FAMILY:
+                            entry = parse_diag_message(data[pos + NLMSG_HDR.size:pos + length])
+                            if entry is not None:
+                                yield entry
+                    pos += _align(length)
+
+
+class TcpRttCollector:
+    """
+    Groups established connections by remote endpoint and reports the
+    kernel's smoothed RTT, RTT variance and retransmits for each.
+
+    Args:
+        filter_ips (iterable): Only report these remote IPs (e.g. the game
+                               servers). None reports every endpoint.
+    """
+
+    def __init__(self, filter_ips=None):
+        self.filter_ips = set(filter_ips) if filter_ips else None
+        self._retrans_seen = {}
+        self._lock = threading.Lock()
+
+    def set_filter(self, filter_ips):
+        with self._lock:
+            self.filter_ips = set(filter_ips) if filter_ips else None
+
+    def collect(self):
+        """
+        Returns {(remote_ip, remote_port): {"connections", "rtt_ms",
+        "rttvar_ms", "min_rtt_ms", "max_rtt_ms", "total_retrans",
+        "new_retrans", "lost", "unacked"}}. RTT figures are averaged over
+        the endpoint's connections; new_retrans counts retransmits since
+        the previous collect().
+        """
+        with self._lock:
+            wanted = self.filter_ips
+            endpoints = {}
+            seen = {}
+            for sock in dump_tcp_sockets():
+                info = sock["info"]
+                if info is None:
+                    continue
+                if wanted is not None and sock["remote_ip"] not in wanted:
+                    continue
+                key = (sock["remote_ip"], sock["remote_port"])
+                ident = sock["cookie"]
+                total = info["total_retrans"]
+                seen[ident] = total
+                rtt = info["rtt"] / 1000.0
+                ep = endpoints.get(key)
+                if ep is None:
+                    ep = endpoints[key] = {
+                        "connections": 0, "rtt_ms": 0.0, "rttvar_ms": 0.0,
+                        "min_rtt_ms": rtt, "max_rtt_ms": rtt, "total_retrans": 0,
+                        "new_retrans": 0, "lost": 0, "unacked": 0,
+                    }
+                ep["connections"] += 1
+                ep["rtt_ms"] += rtt
+                ep["rttvar_ms"] += info["rttvar"] / 1000.0
+                ep["min_rtt_ms"] = min(ep["min_rtt_ms"], rtt)
+                ep["max_rtt_ms"] = max(ep["max_rtt_ms"], rtt)
+                ep["total_retrans"] += total
+                ep["new_retrans"] += max(0, total - self._retrans_seen.get(ident, total))
+                ep["lost"] += info["lost"]
+                ep["unacked"] += info["unacked"]
+            self._retrans_seen = seen
+
+        for ep in endpoints.values():
+            n = ep["connections"]
+            ep["rtt_ms"] = round(ep["rtt_ms"] / n, 3)
+            ep["rttvar_ms"] = round(ep["rttvar_ms"] / n, 3)
+        return endpoints
+
+    def summary_for(self, ip):
+        """Merged stats over every port of one remote IP, or None if not connected."""
+        matches = [ep for (rip, _), ep in self.collect().items() if rip == ip]
+        if not matches:
+            return None
+        n = sum(ep["connections"] for ep in matches)
+        return {
+            "connections": n,
+            "rtt_ms": round(sum(ep["rtt_ms"] * ep["connections"] for ep in matches) / n, 3),
+            "rttvar_ms": round(sum(ep["rttvar_ms"] * ep["connections"] for ep in matches) / n, 3),
+            "total_retrans": sum(ep["total_retrans"] for ep in matches),
+            "new_retrans": sum(ep["new_retrans"] for ep in matches),
+        }
+
+
+# ---- Kernel protocol counters (/proc/net/snmp, /proc/net/netstat) ----
+# (section, counter) behind each health rate
+NET_HEALTH_COUNTERS = {
+    "retrans": ("Tcp", "RetransSegs"),
+    "out_of_order": ("TcpExt", "TCPOFOQueue"),
+    "listen_drops": ("TcpExt", "ListenDrops"),
+    "udp_rcvbuf_errors": ("Udp", "RcvbufErrors"),
+}
+
+def read_net_counters(procfs_root="/proc"):
+    """
+    Parse /proc/net/snmp and /proc/net/netstat (header line + value line per
+    section) into {section: {counter: int}}. Returns {} where they don't exist.
+    """
+    counters = {}
+    for name in ("snmp", "netstat"):
+        try:
+            with open(os.path.join(procfs_root, "net", name), "rb") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            continue
+        for header, values in zip(lines[::2], lines[1::2]):
+            keys = header.split()
+            vals = values.split()
+            if not keys or keys[0] != vals[0]:
+                continue
+            section = keys[0].rstrip(b":").decode()
+            try:
+                counters[section] = {k.decode(): int(v) for k, v in zip(keys[1:], vals[1:])}
+            except ValueError:
+                continue
+    return counters
+
+def net_health_between(prev, cur, elapsed):
+    """
+    Per-second rates of the NET_HEALTH_COUNTERS between two
+    read_net_counters() results, plus retrans_pct (retransmitted share of
+    sent TCP segments). Missing counters come back as None.
+    """
+    elapsed = max(1e-3, elapsed)
+    rates = {}
+    for key, (section, counter) in NET_HEALTH_COUNTERS.items():
+        a = prev.get(section, {}).get(counter)
+        b = cur.get(section, {}).get(counter)
+        rates[key] = max(0, b - a) / elapsed if a is not None and b is not None else None
+
+    sent_prev = prev.get("Tcp", {}).get("OutSegs")
+    sent_cur = cur.get("Tcp", {}).get("OutSegs")
+    rates["retrans_pct"] = None
+    if rates["retrans"] is not None and sent_prev is not None and sent_cur is not None:
+        sent = sent_cur - sent_prev
+        rates["retrans_pct"] = rates["retrans"] * elapsed / sent * 100 if sent > 0 else 0.0
+    return rates
+
+
+if __name__ == "__main__":
+    import time
+
+    # Loopback self-check: open a batch of local connections and dump them
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(512)
+    port = server.getsockname()[1]
+    clients = []
+    for _ in range(200):
+        c = socket.create_connection(("127.0.0.1", port))
+        c.sendall(b"ping")
+        clients.append(c)
+
+    collector = TcpRttCollector(filter_ips={"127.0.0.1"})
+    started = time.perf_counter()
+    endpoints = collector.collect()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{len(endpoints)} endpoints in {elapsed:.1f} ms")
+    for (ip, rport), ep in sorted(endpoints.items(), key=lambda kv: -kv[1]["connections"])[:5]:
+        print(f"  {ip}:{rport}  {ep}")
+
+    for c in clients:
+        c.close()
+    server.close()